@@ -1,6 +1,10 @@
 from districtcooling.parametersreader import ParametersReader
+from districtcooling.compiledgrid import CompiledGrid
 from districtcooling.coolinggrid import CoolingGrid
 from districtcooling.coolingplant import CoolingPlant
+from districtcooling.matrixproblem import MatrixProblem
 from districtcooling.optimizer import LinearOptimizer
 from districtcooling.plotter import Plotter
-from districtcooling.simplebuilding import CubicBuilding
+from districtcooling.scenariosweep import ScenarioSweep
+from districtcooling.simplebuilding import CubicBuilding, CubicBuildingFleet
+from districtcooling.stackedbuildings import StackedBuildings
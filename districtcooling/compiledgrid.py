@@ -0,0 +1,222 @@
+import numpy as np
+import scipy.sparse as sp
+import types
+
+# ======================================================================================================================
+# Compiled array representation of the distribution system's network CLASS
+# ======================================================================================================================
+
+
+class CompiledGrid:
+    """
+    Immutable, integer-indexed array representation of the grid's network, built once from the parameters' nodes,
+    lines and buildings. Nodes and lines are referred to by their positions in parameters.nodes and parameters.lines,
+    their IDs are found in node_ids and line_ids. Holds only NumPy and SciPy arrays (read-only) and read-only mappings,
+    which makes it cheap to pickle to worker processes.
+    """
+
+    node_types = ('reference', 'junction', 'building')
+
+    # INITIALIZATION ===================================================================================================
+
+    def __init__(
+        self,
+        parameters
+    ):
+        nodes = parameters.nodes
+        lines = parameters.lines
+
+        # Nodes --------------------------------------------------------------------------------------------------------
+
+        self.node_ids = np.array(nodes.index)
+        self.node_positions = {node_id: position for position, node_id in enumerate(self.node_ids)}
+        unknown_node_types = set(nodes["Type"]) - set(self.node_types)
+        if unknown_node_types:
+            raise ValueError("Unknown node-type in parameters: " + ", ".join(sorted(unknown_node_types)))
+        self.node_type_codes = np.array([self.node_types.index(node_type) for node_type in nodes["Type"]])
+        self.node_coordinates = nodes[["position-X", "position-Y"]].values.astype(float)
+        self.reference_node_position = np.flatnonzero(self.node_type_codes == 0)[-1]
+        self.non_reference_node_positions = np.delete(np.arange(len(self.node_ids)), self.reference_node_position)
+
+        # Buildings are mapped to the nodes they are connected at
+        self.building_ids = np.array(parameters.buildings.index)
+        self.building_node_positions = np.array([self.node_positions[b_id] for b_id in self.building_ids])
+
+        # Lines --------------------------------------------------------------------------------------------------------
+
+        self.line_ids = np.array(lines.index)
+        self.line_positions = {line_id: position for position, line_id in enumerate(self.line_ids)}
+        self.line_start_positions = np.array([self.node_positions[n_id] for n_id in lines["Start"]])
+        self.line_end_positions = np.array([self.node_positions[n_id] for n_id in lines["End"]])
+
+        # Hydraulic constants of lines
+        self.line_diameters = lines["Diameter [m]"].values.astype(float)
+        self.line_roughnesses = lines["Absolute Roughness [mm]"].values.astype(float)
+        self.line_lengths = lines["Length [m]"].values.astype(float)
+        self.line_relative_roughnesses = (self.line_roughnesses / 1000) / self.line_diameters
+        # Head loss of a line equals friction factor * head loss coefficient * flow * |flow| (Darcy-Weisbach)
+        self.line_head_loss_coefficients = (
+            8
+            * self.line_lengths
+            / (parameters.physics["gravitational acceleration [m^2/s]"] * (np.pi ** 2) * self.line_diameters ** 5)
+        )
+
+        # Incidence and adjacency --------------------------------------------------------------------------------------
+
+        # Incidence matrix (lines x nodes), -1 at the start node and +1 at the end node of a line
+        line_positions = np.arange(len(self.line_ids))
+        self.incidence_matrix = sp.csr_matrix(
+            (
+                np.concatenate([-np.ones(len(line_positions)), np.ones(len(line_positions))]),
+                (
+                    np.concatenate([line_positions, line_positions]),
+                    np.concatenate([self.line_start_positions, self.line_end_positions])
+                )
+            ),
+            shape=(len(self.line_ids), len(self.node_ids))
+        )
+
+        # Node-line adjacency in CSR format: lines of node n are node_line_indices[node_line_indptr[n]:
+        # node_line_indptr[n + 1]], with sign +1 for lines flowing into and -1 for lines flowing out of the node
+        node_line_adjacency = self.incidence_matrix.transpose().tocsr()
+        node_line_adjacency.sort_indices()
+        self.node_line_indptr = node_line_adjacency.indptr
+        self.node_line_indices = node_line_adjacency.indices
+        self.node_line_signs = node_line_adjacency.data
+
+        # Tree topology ------------------------------------------------------------------------------------------------
+
+        self.build_tree_topology()
+
+        # Freezing all arrays ------------------------------------------------------------------------------------------
+
+        self.freeze()
+
+    def __setattr__(self, name, value):
+        if getattr(self, 'is_frozen', False):
+            raise AttributeError("CompiledGrid is immutable, attribute '" + name + "' can not be set")
+        super().__setattr__(name, value)
+
+    def __getstate__(self):
+        # Read-only mappings can not be pickled, hence they are pickled as dicts
+        return {
+            name: dict(value) if isinstance(value, types.MappingProxyType) else value
+            for name, value in self.__dict__.items()
+        }
+
+    def __setstate__(self, state):
+        # Arrays are unpickled as writeable, hence they are frozen again
+        self.__dict__.update(state)
+        self.freeze()
+
+    def freeze(
+        self
+    ):
+        """
+        Makes all arrays (also those of the sparse matrices) read-only, and replaces all dicts by read-only mappings
+        and all lists by tuples.
+        """
+        for name, value in list(self.__dict__.items()):
+            if isinstance(value, dict):
+                self.__dict__[name] = types.MappingProxyType(value)
+            elif isinstance(value, list):
+                self.__dict__[name] = tuple(value)
+            elif sp.issparse(value):
+                value.sort_indices()
+                for array in (value.data, value.indices, value.indptr):
+                    array.setflags(write=False)
+        for value in list(self.__dict__.values()) + list(self.tree_levels):
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+        self.__dict__['is_frozen'] = True
+
+    # METHOD DEFINITIONS ===============================================================================================
+
+    def build_tree_topology(
+        self
+    ):
+        """
+        Orders all nodes breadth-first, starting from the reference node (root). For every node the parent node and the
+        line connecting both is saved, which allows the hydraulic equilibrium of all time steps to be calculated at
+        once by subtree sums (line flows) and root-to-node path sums (nodal heads). If the grid is not a connected tree,
+        is_tree is False and the tree attributes are left empty.
+        """
+        tree_order = [self.reference_node_position]
+        tree_parents = [-1]
+        tree_lines = [-1]
+        tree_depths = [0]
+        tree_indices = {self.reference_node_position: 0}
+        self.is_tree = True
+        index = 0
+        while index < len(tree_order) and self.is_tree:
+            node_position = tree_order[index]
+            for line_position, sign in zip(*self.get_node_lines(node_position)):
+                if line_position == tree_lines[index]:
+                    continue
+                if sign > 0:
+                    neighbour_position = self.line_start_positions[line_position]
+                else:
+                    neighbour_position = self.line_end_positions[line_position]
+                if neighbour_position in tree_indices:
+                    self.is_tree = False
+                    break
+                tree_indices[neighbour_position] = len(tree_order)
+                tree_order.append(neighbour_position)
+                tree_parents.append(index)
+                tree_lines.append(line_position)
+                tree_depths.append(tree_depths[index] + 1)
+            index += 1
+        if len(tree_order) != len(self.node_ids):
+            self.is_tree = False
+
+        if not self.is_tree:
+            self.tree_order = np.array([], dtype=int)
+            self.tree_indices = np.array([], dtype=int)
+            self.tree_parents = np.array([], dtype=int)
+            self.tree_lines = np.array([], dtype=int)
+            self.tree_line_signs = np.array([])
+            self.tree_levels = []
+            return
+
+        # Tree index k of every node; node tree_order[k] hangs at its parent tree_order[tree_parents[k]] by line
+        # tree_lines[k - 1], whose flow in direction parent -> child equals tree_line_signs[k - 1] * line flow
+        self.tree_order = np.array(tree_order)
+        self.tree_indices = np.empty(len(tree_order), dtype=int)
+        self.tree_indices[self.tree_order] = np.arange(len(tree_order))
+        self.tree_parents = np.array(tree_parents)
+        self.tree_lines = np.array(tree_lines[1:])
+        self.tree_line_signs = np.where(self.line_end_positions[self.tree_lines] == self.tree_order[1:], 1.0, -1.0)
+
+        # Tree indices grouped by depth, excluding the root
+        tree_depths = np.array(tree_depths)
+        self.tree_levels = [
+            np.flatnonzero(tree_depths == depth)
+            for depth in range(1, tree_depths.max() + 1)
+        ]
+
+    def get_node_lines(
+        self,
+        node_position
+    ):
+        """
+        :return: Positions of all lines adjacent to the node and their signs, +1 for lines flowing into and -1 for
+        lines flowing out of the node.
+        """
+        start = self.node_line_indptr[node_position]
+        end = self.node_line_indptr[node_position + 1]
+        return self.node_line_indices[start:end], self.node_line_signs[start:end]
+
+    def get_tree_path(
+        self,
+        node_position
+    ):
+        """
+        :return: Tree indices of all nodes on the path from the given node up to the reference node (excluding the
+        latter). The line connecting the node at tree index k with its parent is found at tree_lines[k - 1].
+        """
+        path = []
+        index = self.tree_indices[node_position]
+        while index > 0:
+            path.append(index)
+            index = self.tree_parents[index]
+        return path
@@ -1,5 +1,36 @@
-import pandas as pd
+import concurrent.futures
+import json
 import numpy as np
+import os
+import pandas as pd
+import scipy.sparse as sp
+import scipy.sparse.linalg
+
+from districtcooling.compiledgrid import CompiledGrid
+
+
+def to_json_label(label):
+    """Converts a DataFrame label into a JSON serializable value, e.g. a numpy integer into a Python integer."""
+    if isinstance(label, np.generic):
+        return label.item()
+    return label
+
+
+# Grid of the current worker process, set once per process by initialize_simulation_worker
+simulation_worker_grid = None
+
+
+def initialize_simulation_worker(grid):
+    global simulation_worker_grid
+    simulation_worker_grid = grid
+
+
+def simulate_time_window(ets_flow_time_array):
+    return simulation_worker_grid.get_grid_simulation(
+        ets_flow_time_array=ets_flow_time_array,
+        deduplicate=False
+    )
+
 
 # ======================================================================================================================
 # Model of distribution system (=cooling grid) CLASS
@@ -17,41 +48,92 @@ class CoolingGrid:
 
     def __init__(
         self,
-        parameters
+        parameters,
+        hydraulic_solver='auto'
     ):
         # Saving parameters --------------------------------------------------------------------------------------------
 
         self.parameters = parameters
+        self.hydraulic_solver = hydraulic_solver
+
+        # Compiling the grid's network into an array representation --------------------------------------------------
+
+        self.compiled_grid = CompiledGrid(parameters=self.parameters)
 
         # Forming incidence matrices of the Digraph --------------------------------------------------------------------
 
-        # Incidence matrix of full grid
-        dict_temp = {}
-        for n_id in self.parameters.nodes.index:
-            list_temp = []
-            for l_id in self.parameters.lines.index:
-                if n_id == self.parameters.lines["Start"][l_id]:
-                    list_temp.append(-1)
-                elif n_id == self.parameters.lines["End"][l_id]:
-                    list_temp.append(+1)
-                else:
-                    list_temp.append(0)
-                dict_temp[n_id] = list_temp
-        self.incidence_matrix_complete = pd.DataFrame(dict_temp, columns=dict_temp.keys())
-        self.incidence_matrix_complete.index = list(self.parameters.lines.index)
+        # Sparse incidence matrix of full grid (lines x nodes), -1 at the start node and +1 at the end node of a line
+        self.incidence_matrix_complete_sparse = self.compiled_grid.incidence_matrix
 
         # Excluding reference node (root) - having a predefined head of 0 - from matrix, resulting in square incidence
         # matrix, suitable for direct calculation
-        for n_id in self.parameters.nodes.index:
-            if self.parameters.nodes["Type"][n_id] == "reference":
-                self.incidence_matrix_potential = self.incidence_matrix_complete[[n_id]]
-                self.incidence_matrix = self.incidence_matrix_complete.drop(columns=n_id)
+        self.reference_node_id = self.compiled_grid.node_ids[self.compiled_grid.reference_node_position]
+        self.non_reference_node_ids = list(
+            self.compiled_grid.node_ids[self.compiled_grid.non_reference_node_positions]
+        )
+        self.incidence_matrix_sparse = (
+            self.incidence_matrix_complete_sparse[:, self.compiled_grid.non_reference_node_positions]
+        )
+
+        # Dense DataFrame views of the incidence matrices are only formed on demand
+        self.incidence_matrix_complete_dense = None
+
+        # Precomputing coefficient of pumping power --------------------------------------------------------------------
+
+        # Electric power of secondary pumps per head difference [m] and flow [qbm/s]
+        self.pumping_power_coefficient = (
+            (1 / self.parameters.distribution_system["pump efficiency secondary pump [-]"])
+            * self.parameters.physics["water density [kg/m^3]"]
+            * self.parameters.physics["gravitational acceleration [m^2/s]"]
+        )
+
+        # Choosing hydraulic solver depending on topology --------------------------------------------------------------
+
+        # Tree-like grids are solved directly, looped (meshed) grids iteratively by the Newton-Raphson method
+        if self.hydraulic_solver == 'auto':
+            self.hydraulic_solver = 'tree' if self.compiled_grid.is_tree else 'newton'
+        if self.hydraulic_solver == 'tree':
+            if not self.compiled_grid.is_tree:
+                raise ValueError("Tree solver requires a connected, tree-like grid")
+            # IDs of nodes and of the lines connecting them to their parents, in breadth-first order from the root
+            self.tree_node_ids = list(self.compiled_grid.node_ids[self.compiled_grid.tree_order])
+            self.tree_line_ids = list(self.compiled_grid.line_ids[self.compiled_grid.tree_lines])
+        elif self.hydraulic_solver not in ('dense', 'newton'):
+            raise ValueError(
+                "Unknown hydraulic solver '" + str(self.hydraulic_solver) + "', use 'auto', 'tree', 'newton' or 'dense'"
+            )
 
-        # Transposing square incidence matrix
-        self.incidence_matrix_transposed = self.incidence_matrix.transpose()
+        # Settings and statistics of the Newton-Raphson solver
+        self.newton_tolerance = 1e-9
+        self.newton_maximum_iterations = 100
+        self.newton_statistics = None
 
     # METHOD DEFINITIONS ===============================================================================================
 
+    # Properties forming dense views of the incidence matrices ---------------------------------------------------------
+
+    @property
+    def incidence_matrix_complete(self):
+        if self.incidence_matrix_complete_dense is None:
+            self.incidence_matrix_complete_dense = pd.DataFrame(
+                data=self.incidence_matrix_complete_sparse.toarray().astype(int),
+                index=list(self.parameters.lines.index),
+                columns=list(self.parameters.nodes.index)
+            )
+        return self.incidence_matrix_complete_dense
+
+    @property
+    def incidence_matrix_potential(self):
+        return self.incidence_matrix_complete[[self.reference_node_id]]
+
+    @property
+    def incidence_matrix(self):
+        return self.incidence_matrix_complete[self.non_reference_node_ids]
+
+    @property
+    def incidence_matrix_transposed(self):
+        return self.incidence_matrix.transpose()
+
     # Methods to calculate the steady-state, non-linear hydraulic-equilibrium of a tree-like grid ----------------------
 
     def build_ets_flow_time_array(
@@ -79,7 +161,7 @@ class CoolingGrid:
                 junction_nodes_ids.append(nodes_id)
         junction_consumptions_dict = {
             time_step: [0*id for id in junction_nodes_ids]
-            for time_step in self.parameters.environment.index
+            for time_step in ets_flows_time_array.columns
         }
         junction_consumptions_frame = pd.DataFrame(
             data=junction_consumptions_dict, index=[id for id in junction_nodes_ids])
@@ -110,16 +192,35 @@ class CoolingGrid:
         self,
         nodal_consumptions_time_array
     ):
+        if self.hydraulic_solver == 'tree':
+            # Flow in a line equals the consumption of the subtree behind it, summed up level by level from the leaves
+            subtree_consumptions = (
+                nodal_consumptions_time_array.reindex(self.tree_node_ids).fillna(0).values.astype(float)
+            )
+            for level in reversed(self.compiled_grid.tree_levels[1:]):
+                np.add.at(
+                    subtree_consumptions,
+                    self.compiled_grid.tree_parents[level],
+                    subtree_consumptions[level]
+                )
+            line_flows = pd.DataFrame(
+                data=self.compiled_grid.tree_line_signs[:, np.newaxis] * subtree_consumptions[1:],
+                index=self.tree_line_ids,
+                columns=nodal_consumptions_time_array.columns
+            ).reindex(list(self.parameters.lines.index))
+            return line_flows
+
+        incidence_matrix_transposed = self.incidence_matrix_transposed.values
         line_flows_temp = {
             time_step: np.linalg.solve(
-                self.incidence_matrix_transposed.values,
+                incidence_matrix_transposed,
                 nodal_consumptions_time_array[time_step].values
             )
             for time_step in nodal_consumptions_time_array.columns
         }
         line_flows = pd.DataFrame(
             data=line_flows_temp,
-            index=list(self.incidence_matrix.index))
+            index=list(self.parameters.lines.index))
         return line_flows
 
     @staticmethod
@@ -205,35 +306,126 @@ class CoolingGrid:
         )
         return pipe_head_loss
 
+    def get_pipe_friction_factor_array(
+        self,
+        pipe_flow,
+        pipe_diameter,
+        pipe_roughness
+    ):
+        """
+        Array version of get_pipe_friction_factor, evaluating all flow regimes at once through masks.
+        :var pipe_flow: volumetric flows in cubic metres per second [cbm/s], e.g. shaped (lines x time steps).
+        :param pipe_diameter: in metres [m], broadcastable against pipe_flow, e.g. shaped (lines x 1).
+        :param pipe_roughness: absolute roughness (epsilon) in millimeters [mm], broadcastable against pipe_flow.
+        :return: Darcy-Weisbach friction factors f, dimensionless in terms of unit, and a boolean mask of all entries
+        outside of the scope of the correlations (their friction factor is NaN).
+        """
+        pipe_flow = np.asarray(pipe_flow, dtype=float)
+        pipe_velocity = self.get_pipe_velocity(pipe_flow, pipe_diameter)
+        reynold = np.broadcast_to(self.get_reynold(pipe_velocity, pipe_diameter), pipe_flow.shape)
+        relative_roughness = np.broadcast_to((np.asarray(pipe_roughness) / 1000) / pipe_diameter, pipe_flow.shape)
+
+        # No flow at all
+        pipe_friction_factor = np.zeros(pipe_flow.shape)
+
+        # Laminar Flow, based on Hagen-Poiseuille velocity profile, analytical correlation
+        laminar = (reynold > 0) & (reynold < 4000)
+        pipe_friction_factor[laminar] = 64 / reynold[laminar]
+
+        # Turbulent flow, Swamee-Jain formula, approximating correlation of Colebrook-White equation
+        turbulent = (
+            (reynold >= 4000)
+            & (reynold <= 100000000)
+            & (relative_roughness >= 0.000001)
+            & (relative_roughness <= 0.01)
+        )
+        pipe_friction_factor[turbulent] = 1.325 / (
+            np.log(
+                relative_roughness[turbulent] / 3.7 + 5.74 / (reynold[turbulent] ** 0.9)
+            )
+        ) ** 2
+
+        # Outside of scope:
+        out_of_range = (reynold != 0) & ~laminar & ~turbulent
+        pipe_friction_factor[out_of_range] = np.nan
+
+        return pipe_friction_factor, out_of_range
+
+    def get_line_head_loss_array(
+        self,
+        line_flows,
+        line_positions
+    ):
+        """
+        :param line_flows: volumetric flows in cubic metres per second [cbm/s], shaped (lines) or (lines x time steps).
+        :param line_positions: positions of the lines within the compiled grid.
+        :return: head losses in meters of water [m] and a boolean mask of all entries outside of the scope of the
+        friction factor correlations (their head loss is NaN).
+        """
+        line_flows = np.asarray(line_flows, dtype=float)
+        line_positions = np.asarray(line_positions, dtype=int).reshape((-1,) + (1,) * (line_flows.ndim - 1))
+        pipe_friction_factor, out_of_range = self.get_pipe_friction_factor_array(
+            line_flows,
+            self.compiled_grid.line_diameters[line_positions],
+            self.compiled_grid.line_roughnesses[line_positions]
+        )
+
+        # Darcy-Weisbach Equation
+        line_head_loss = (
+            pipe_friction_factor
+            * self.compiled_grid.line_head_loss_coefficients[line_positions]
+            * line_flows
+            * np.fabs(line_flows)
+        )
+        return line_head_loss, out_of_range
+
     def get_line_head_loss_time_array(
         self,
-        line_flow_time_array
+        line_flow_time_array,
+        return_out_of_range=False
     ):
         """
         :var line_flows: all volumetric flows through the lines (pipes) listed inside a panda,
          in cubic metres per second [cbm/s].
         :param self.lines_parameters: all parameters related to the grid's lines.
+        :param return_out_of_range: if True, additionally return a boolean panda marking all flows outside of the
+        scope of the friction factor correlations.
         :return: All head losses occurring over the grid's lines due to friction listed inside a panda, in meters of
-        water [m].
+        water [m]. Head losses outside of the scope of the friction factor correlations are NaN.
         """
-        line_head_loss_dict = {
-            time_step: [
-                self.get_pipe_head_loss(
-                    line_flow_time_array[time_step][line_id],
-                    self.parameters.lines["Diameter [m]"][line_id],
-                    self.parameters.lines["Absolute Roughness [mm]"][line_id],
-                    self.parameters.lines["Length [m]"][line_id]
-                )
-                for line_id in line_flow_time_array.index
-            ]
-            for time_step in line_flow_time_array.columns
-        }
+        line_head_loss, out_of_range = self.get_line_head_loss_array(
+            line_flow_time_array.values,
+            [self.compiled_grid.line_positions[line_id] for line_id in line_flow_time_array.index]
+        )
         line_head_loss_frame = pd.DataFrame(
-            data=line_head_loss_dict,
-            index=list(line_flow_time_array.index)
+            data=line_head_loss,
+            index=list(line_flow_time_array.index),
+            columns=line_flow_time_array.columns
         )
+        if return_out_of_range:
+            out_of_range_frame = pd.DataFrame(
+                data=out_of_range,
+                index=list(line_flow_time_array.index),
+                columns=line_flow_time_array.columns
+            )
+            return line_head_loss_frame, out_of_range_frame
         return line_head_loss_frame
 
+    def get_tree_nodal_heads(
+        self,
+        tree_line_head_losses
+    ):
+        """
+        :param tree_line_head_losses: head losses of the lines in tree order (self.tree_line_ids) over time, as array.
+        :return: heads of the nodes in tree order (self.tree_node_ids) over time, as array.
+        """
+        # Head at a node equals the head at its parent minus the head loss over the line in between
+        line_head_losses = self.compiled_grid.tree_line_signs[:, np.newaxis] * tree_line_head_losses
+        nodal_heads = np.zeros((len(self.tree_node_ids), tree_line_head_losses.shape[1]))
+        for level in self.compiled_grid.tree_levels:
+            nodal_heads[level] = nodal_heads[self.compiled_grid.tree_parents[level]] - line_head_losses[level - 1]
+        return nodal_heads
+
     def get_nodal_head_time_array(
         self,
         line_head_loss_time_array
@@ -245,16 +437,28 @@ class CoolingGrid:
         :return: nodal_heads: Total heads occurring at all nodes of the grid, listed inside a panda, in meters of
         water [m].
         """
+        if self.hydraulic_solver == 'tree':
+            nodal_heads = self.get_tree_nodal_heads(
+                line_head_loss_time_array.loc[self.tree_line_ids].values
+            )
+            all_nodal_heads_frame = pd.DataFrame(
+                data=nodal_heads,
+                index=self.tree_node_ids,
+                columns=line_head_loss_time_array.columns
+            ).reindex([self.reference_node_id] + self.non_reference_node_ids)
+            return all_nodal_heads_frame
+
+        incidence_matrix = self.incidence_matrix.values
         nodal_head_calculation_dict = {
             time_step: np.linalg.solve(
-                self.incidence_matrix.values,
+                incidence_matrix,
                 -line_head_loss_time_array[time_step].values
                 )
             for time_step in line_head_loss_time_array.columns
         }
         nodal_head_calculation_frame = pd.DataFrame(
             data=nodal_head_calculation_dict,
-            index=list(self.incidence_matrix_transposed.index)
+            index=self.non_reference_node_ids
         )
         reference_node_head_dict = {
             time_step: 0
@@ -272,6 +476,102 @@ class CoolingGrid:
         )
         return all_nodal_heads_frame
 
+    # Methods to calculate the steady-state, non-linear hydraulic-equilibrium of a looped grid -------------------------
+
+    def get_looped_equilibrium_time_arrays(
+        self,
+        nodal_consumptions_time_array
+    ):
+        """
+        Solves the hydraulic equilibrium of a looped (meshed) grid with the Newton-Raphson method, time step by time
+        step. Unknowns are the line flows q and the heads h of all nodes except the reference node, which fulfill
+            head loss(q) + A h = 0    (head loss over every line)
+            A^T q = c                 (flow balance at every node)
+        with the incidence matrix A (excluding the reference node) and the nodal consumptions c. The Jacobian is
+        assembled sparsely, neglecting the derivative of the friction factor. Every time step is warm-started from the
+        solution of the previous one. Convergence statistics are saved in self.newton_statistics.
+        :param nodal_consumptions_time_array: nodal consumptions (excluding the reference node) over time.
+        :return: line flows and all nodal heads over time, laid out as of get_line_flows_time_array and
+        get_nodal_head_time_array.
+        """
+        incidence_matrix = self.incidence_matrix_sparse.tocsc()
+        line_positions = np.arange(len(self.compiled_grid.line_ids))
+        line_count = len(line_positions)
+        nodal_consumptions = (
+            nodal_consumptions_time_array.reindex(self.non_reference_node_ids).fillna(0).values.astype(float)
+        )
+        time_step_count = nodal_consumptions.shape[1]
+
+        line_flows = np.zeros((line_count, time_step_count))
+        nodal_heads = np.zeros((len(self.non_reference_node_ids), time_step_count))
+        iterations = np.zeros(time_step_count, dtype=int)
+        residuals = np.zeros(time_step_count)
+        line_flow = np.zeros(line_count)
+        nodal_head = np.zeros(len(self.non_reference_node_ids))
+        for column in range(time_step_count):
+            for iteration in range(1, self.newton_maximum_iterations + 1):
+                line_head_loss, _ = self.get_line_head_loss_array(line_flow, line_positions)
+                residual = np.concatenate([
+                    line_head_loss + incidence_matrix @ nodal_head,
+                    incidence_matrix.transpose() @ line_flow - nodal_consumptions[:, column]
+                ])
+                residuals[column] = np.max(np.fabs(residual))
+                if residuals[column] < self.newton_tolerance:
+                    break
+
+                # Derivative of the head loss, for laminar flow head loss is proportional to the flow
+                friction_factor, _ = self.get_pipe_friction_factor_array(
+                    line_flow,
+                    self.compiled_grid.line_diameters,
+                    self.compiled_grid.line_roughnesses
+                )
+                reynold = self.get_reynold(
+                    self.get_pipe_velocity(line_flow, self.compiled_grid.line_diameters),
+                    self.compiled_grid.line_diameters
+                )
+                line_head_loss_derivative = np.maximum(
+                    np.where(reynold < 4000, 1, 2)
+                    * friction_factor
+                    * self.compiled_grid.line_head_loss_coefficients
+                    * np.fabs(line_flow),
+                    1e-8
+                )
+                jacobian = sp.bmat(
+                    [
+                        [sp.diags(line_head_loss_derivative), incidence_matrix],
+                        [incidence_matrix.transpose(), None]
+                    ],
+                    format='csc'
+                )
+                step = sp.linalg.spsolve(jacobian, -residual)
+                line_flow = line_flow + step[:line_count]
+                nodal_head = nodal_head + step[line_count:]
+            iterations[column] = iteration
+            line_flows[:, column] = line_flow
+            nodal_heads[:, column] = nodal_head
+
+        self.newton_statistics = pd.DataFrame(
+            data={
+                'Iterations [-]': iterations,
+                'Max. residual': residuals,
+                'Converged': residuals < self.newton_tolerance
+            },
+            index=nodal_consumptions_time_array.columns
+        )
+        line_flow_time_array = pd.DataFrame(
+            data=line_flows,
+            index=list(self.compiled_grid.line_ids),
+            columns=nodal_consumptions_time_array.columns
+        )
+        nodal_head_time_array = pd.DataFrame(
+            data=np.vstack([np.zeros((1, time_step_count)), nodal_heads]),
+            index=[self.reference_node_id] + self.non_reference_node_ids,
+            columns=nodal_consumptions_time_array.columns
+        )
+        return line_flow_time_array, nodal_head_time_array
+
+    # Method calculating the hydraulic equilibrium of the grid for all time steps --------------------------------------
+
     def get_tree_equilibrium_time_array(
         self,
         ets_flow_time_array
@@ -282,15 +582,23 @@ class CoolingGrid:
         reference_node_consumption_time_row = self.get_reference_node_consumption_time_row(
             nodal_consumptions_time_array=nodal_consumptions_time_array
         )
-        line_flow_time_array = self.get_line_flows_time_array(
-            nodal_consumptions_time_array=nodal_consumptions_time_array
-        )
-        line_head_loss_time_array = self.get_line_head_loss_time_array(
-            line_flow_time_array=line_flow_time_array
-        )
-        nodal_head_time_array = self.get_nodal_head_time_array(
-            line_head_loss_time_array=line_head_loss_time_array
-        )
+        if self.hydraulic_solver == 'newton':
+            line_flow_time_array, nodal_head_time_array = self.get_looped_equilibrium_time_arrays(
+                nodal_consumptions_time_array=nodal_consumptions_time_array
+            )
+            line_head_loss_time_array = self.get_line_head_loss_time_array(
+                line_flow_time_array=line_flow_time_array
+            )
+        else:
+            line_flow_time_array = self.get_line_flows_time_array(
+                nodal_consumptions_time_array=nodal_consumptions_time_array
+            )
+            line_head_loss_time_array = self.get_line_head_loss_time_array(
+                line_flow_time_array=line_flow_time_array
+            )
+            nodal_head_time_array = self.get_nodal_head_time_array(
+                line_head_loss_time_array=line_head_loss_time_array
+            )
         tree_equilibrium_time_array = pd.concat(
             [
                 nodal_consumptions_time_array,
@@ -316,17 +624,14 @@ class CoolingGrid:
         self,
         nodal_head_time_array
     ):
-        ets_head_difference_time_array_dict = {
-            time_step: [
+        ets_head_difference_time_array_frame = pd.DataFrame(
+            data=(
                 2
-                * np.fabs(nodal_head_time_array[time_step][building_id])
+                * np.fabs(nodal_head_time_array.loc[self.parameters.buildings.index].values)
                 + self.parameters.distribution_system["head loss in ETS [m]"]
-                for building_id in self.parameters.buildings.index
-            ] for time_step in nodal_head_time_array.columns
-        }
-        ets_head_difference_time_array_frame = pd.DataFrame(
-            data=ets_head_difference_time_array_dict,
-            index=list(self.parameters.buildings.index)
+            ),
+            index=list(self.parameters.buildings.index),
+            columns=nodal_head_time_array.columns
         )
         return ets_head_difference_time_array_frame
 
@@ -335,19 +640,14 @@ class CoolingGrid:
         ets_head_difference_time_array,
         central_flow_time_row
     ):
-        central_pumping_power_time_dict = {
-            time_step: (
-                (1 / self.parameters.distribution_system["pump efficiency secondary pump [-]"])
-                * self.parameters.physics["water density [kg/m^3]"]
-                * self.parameters.physics["gravitational acceleration [m^2/s]"]
-                * ets_head_difference_time_array[time_step].max()
-                * np.fabs(central_flow_time_row[time_step][0])
-            )
-            for time_step in ets_head_difference_time_array.columns
-        }
         central_pumping_power_time_row = pd.DataFrame(
-            data=central_pumping_power_time_dict,
-            index=[0]
+            data=(
+                self.pumping_power_coefficient
+                * np.nanmax(ets_head_difference_time_array.values, axis=0)
+                * np.fabs(central_flow_time_row.values[0])
+            )[np.newaxis, :],
+            index=[0],
+            columns=ets_head_difference_time_array.columns
         )
         return central_pumping_power_time_row
 
@@ -356,20 +656,14 @@ class CoolingGrid:
         ets_head_difference_time_array,
         nodal_consumptions_time_array
     ):
-        distributed_pumping_power_time_dict = {
-            time_step: [
-                (1 / self.parameters.distribution_system["pump efficiency secondary pump [-]"])
-                * self.parameters.physics["water density [kg/m^3]"]
-                * self.parameters.physics["gravitational acceleration [m^2/s]"]
-                * ets_head_difference_time_array[time_step][ets_id]
-                * np.fabs(nodal_consumptions_time_array[time_step][ets_id])
-                for ets_id in ets_head_difference_time_array.index
-            ]
-            for time_step in ets_head_difference_time_array.columns
-        }
         distributed_pumping_power_time_array = pd.DataFrame(
-            data=distributed_pumping_power_time_dict,
-            index=list(ets_head_difference_time_array.index)
+            data=(
+                self.pumping_power_coefficient
+                * ets_head_difference_time_array.values
+                * np.fabs(nodal_consumptions_time_array.loc[ets_head_difference_time_array.index].values)
+            ),
+            index=list(ets_head_difference_time_array.index),
+            columns=ets_head_difference_time_array.columns
         )
         return distributed_pumping_power_time_array
 
@@ -388,13 +682,10 @@ class CoolingGrid:
             ets_head_difference_time_array=ets_head_difference_time_array,
             nodal_consumptions_time_array=tree_equilibrium_time_array.loc["Nodal consumptions [qbm/s]"]
         )
-        overall_distributed_pumping_power_time_dict = {
-            time_step: distributed_pumping_power_time_array[time_step].sum()
-            for time_step in tree_equilibrium_time_array.columns
-        }
         overall_distributed_pumping_power_time_row = pd.DataFrame(
-            data=overall_distributed_pumping_power_time_dict,
-            index=[None]
+            data=np.nansum(distributed_pumping_power_time_array.values, axis=0)[np.newaxis, :],
+            index=[None],
+            columns=tree_equilibrium_time_array.columns
         )
         grid_pumping = pd.concat(
             [
@@ -415,10 +706,44 @@ class CoolingGrid:
 
     # Method triggering a complete non-linear simulation of the distribution system ------------------------------------
 
+    @staticmethod
+    def get_unique_ets_flow_positions(
+        ets_flow_time_array
+    ):
+        """
+        :param ets_flow_time_array: ETS flows of all buildings (rows) over time (columns).
+        :return: Positions of the first occurrence of every distinct ETS flow column, in order of occurrence, and for
+        every column the position of its distinct column within the former.
+        """
+        _, first_positions, inverse_positions = np.unique(
+            ets_flow_time_array.values.transpose(),
+            axis=0,
+            return_index=True,
+            return_inverse=True
+        )
+        order = np.argsort(first_positions)
+        ranks = np.empty(len(order), dtype=int)
+        ranks[order] = np.arange(len(order))
+        return first_positions[order], ranks[inverse_positions.reshape(-1)]
+
     def get_grid_simulation(
         self,
-        ets_flow_time_array
+        ets_flow_time_array,
+        deduplicate=True
     ):
+        # Identical ETS flow columns describe the same operating point, which is therefore only simulated once and
+        # fanned out to all of its time steps afterwards
+        if deduplicate:
+            unique_positions, inverse_positions = self.get_unique_ets_flow_positions(ets_flow_time_array)
+            if len(unique_positions) < len(ets_flow_time_array.columns):
+                unique_grid_simulation = self.get_grid_simulation(
+                    ets_flow_time_array=ets_flow_time_array.iloc[:, unique_positions],
+                    deduplicate=False
+                )
+                distribution_system_simulation = unique_grid_simulation.iloc[:, inverse_positions]
+                distribution_system_simulation.columns = ets_flow_time_array.columns
+                return distribution_system_simulation
+
         # Calculating hydraulic equilibrium of return-side grid
         tree_equilibrium_time_array = self.get_tree_equilibrium_time_array(
             ets_flow_time_array=ets_flow_time_array
@@ -436,6 +761,232 @@ class CoolingGrid:
         )
         return distribution_system_simulation
 
+    # Methods for streaming a long simulation horizon in time windows --------------------------------------------------
+
+    def iterate_grid_simulation(
+        self,
+        ets_flow_time_array,
+        chunk_size
+    ):
+        """
+        Simulates the distribution system window by window, so that only the results of one time window are held in
+        memory at once.
+        :param ets_flow_time_array: ETS flows of all buildings (rows) over time (columns).
+        :param chunk_size: number of time steps per window.
+        :return: generator yielding the grid simulation (as of get_grid_simulation) of every time window.
+        """
+        for start in range(0, len(ets_flow_time_array.columns), chunk_size):
+            yield self.get_grid_simulation(
+                ets_flow_time_array=ets_flow_time_array.iloc[:, start:(start + chunk_size)]
+            )
+
+    def save_grid_simulation(
+        self,
+        ets_flow_time_array,
+        path,
+        chunk_size=1000
+    ):
+        """
+        Simulates the distribution system window by window and writes every window into an on-disk store right away.
+        The store is a directory holding the results as column-major (one contiguous block per time step) NumPy array
+        'values.npy', plus the row and column labels in 'labels.json'. Load it again with load_grid_simulation.
+        :param ets_flow_time_array: ETS flows of all buildings (rows) over time (columns).
+        :param path: directory of the store, created if not existing.
+        :param chunk_size: number of time steps per window.
+        """
+        os.makedirs(path, exist_ok=True)
+        values = None
+        start = 0
+        for grid_simulation in self.iterate_grid_simulation(ets_flow_time_array, chunk_size):
+            if values is None:
+                values = np.lib.format.open_memmap(
+                    os.path.join(path, 'values.npy'),
+                    mode='w+',
+                    dtype=float,
+                    shape=(len(grid_simulation.index), len(ets_flow_time_array.columns)),
+                    fortran_order=True
+                )
+                with open(os.path.join(path, 'labels.json'), 'w') as labels_file:
+                    json.dump(
+                        {
+                            'index': [[to_json_label(label) for label in row] for row in grid_simulation.index],
+                            'index_names': list(grid_simulation.index.names),
+                            'columns': [to_json_label(label) for label in ets_flow_time_array.columns]
+                        },
+                        labels_file
+                    )
+            values[:, start:(start + len(grid_simulation.columns))] = grid_simulation.values
+            values.flush()
+            start += len(grid_simulation.columns)
+        del values
+
+    @staticmethod
+    def load_grid_simulation(
+        path
+    ):
+        """
+        :param path: directory of a store written by save_grid_simulation.
+        :return: grid simulation DataFrame, whose values are memory-mapped from disk (read-only).
+        """
+        with open(os.path.join(path, 'labels.json')) as labels_file:
+            labels = json.load(labels_file)
+        grid_simulation = pd.DataFrame(
+            data=np.load(os.path.join(path, 'values.npy'), mmap_mode='r'),
+            index=pd.MultiIndex.from_tuples(
+                [tuple(row) for row in labels['index']],
+                names=labels['index_names']
+            ),
+            columns=labels['columns'],
+            copy=False
+        )
+        return grid_simulation
+
+    # Method for incrementally updating a grid simulation --------------------------------------------------------------
+
+    def update_grid_simulation(
+        self,
+        grid_simulation,
+        changed_ets_flows
+    ):
+        """
+        Updates a previous grid simulation for a sparse set of changed ETS flows. Only line flows on the changed
+        buildings' paths to the reference node and their head losses are recalculated, while nodal heads and pumping
+        powers are recalculated for the affected time steps only.
+        :param grid_simulation: previous grid simulation, as of get_grid_simulation.
+        :param changed_ets_flows: new ETS flows, as dict or Series keyed by (building ID, time step).
+        :return: updated grid simulation.
+        """
+        if self.hydraulic_solver != 'tree':
+            raise ValueError("Incremental update of a grid simulation requires the tree solver")
+
+        values = grid_simulation.to_numpy(dtype=float, copy=True)
+        consumption_rows = self.get_grid_simulation_rows(grid_simulation, 'Nodal consumptions [qbm/s]')
+        reference_row = self.get_grid_simulation_rows(grid_simulation, 'Ref. node consumption [qbm/s]').iloc[0]
+        line_flow_rows = self.get_grid_simulation_rows(grid_simulation, 'Flow in lines [qbm/s]')
+        line_head_loss_rows = self.get_grid_simulation_rows(grid_simulation, 'Head loss over lines [m]')
+        nodal_head_rows = self.get_grid_simulation_rows(grid_simulation, 'Total head at nodes [m]')
+
+        # Changed ETS flows are added to the line flows along their paths to the reference node
+        affected_lines = {}
+        for (building_id, time_step), ets_flow in pd.Series(changed_ets_flows, dtype=float).items():
+            column = grid_simulation.columns.get_loc(time_step)
+            consumption_change = ets_flow - values[consumption_rows[building_id], column]
+            if consumption_change == 0:
+                continue
+            values[consumption_rows[building_id], column] = ets_flow
+            values[reference_row, column] -= consumption_change
+            for index in self.compiled_grid.get_tree_path(self.compiled_grid.node_positions[building_id]):
+                line_id = self.tree_line_ids[index - 1]
+                values[line_flow_rows[line_id], column] += (
+                    self.compiled_grid.tree_line_signs[index - 1] * consumption_change
+                )
+                affected_lines.setdefault(line_id, set()).add(column)
+        if not affected_lines:
+            return grid_simulation.copy()
+
+        # Head losses are recalculated for the affected lines and time steps
+        affected_line_ids = [line_id for line_id in affected_lines for column in affected_lines[line_id]]
+        affected_rows = line_flow_rows[affected_line_ids].values
+        affected_columns = np.array([column for line_id in affected_lines for column in affected_lines[line_id]])
+        line_head_loss, _ = self.get_line_head_loss_array(
+            values[affected_rows, affected_columns],
+            [self.compiled_grid.line_positions[line_id] for line_id in affected_line_ids]
+        )
+        values[line_head_loss_rows[affected_line_ids].values, affected_columns] = line_head_loss
+
+        # Nodal heads are recalculated for the affected time steps
+        affected_columns = np.unique(affected_columns)
+        nodal_heads = self.get_tree_nodal_heads(
+            values[np.ix_(line_head_loss_rows[self.tree_line_ids].values, affected_columns)]
+        )
+        values[np.ix_(nodal_head_rows[self.tree_node_ids].values, affected_columns)] = nodal_heads
+
+        # Pumping powers are recalculated for the affected time steps
+        equilibrium_rows = np.concatenate([
+            consumption_rows.values,
+            [reference_row],
+            line_flow_rows.values,
+            line_head_loss_rows.values,
+            nodal_head_rows.values
+        ])
+        tree_equilibrium_time_array = pd.DataFrame(
+            data=values[np.ix_(equilibrium_rows, affected_columns)],
+            index=grid_simulation.index[equilibrium_rows],
+            columns=grid_simulation.columns[affected_columns]
+        )
+        grid_pumping = self.get_grid_pumping(
+            tree_equilibrium_time_array=tree_equilibrium_time_array
+        )
+        values[np.ix_(grid_simulation.index.get_indexer(grid_pumping.index), affected_columns)] = grid_pumping.values
+
+        updated_grid_simulation = pd.DataFrame(
+            data=values,
+            index=grid_simulation.index,
+            columns=grid_simulation.columns
+        )
+        return updated_grid_simulation
+
+    @staticmethod
+    def get_grid_simulation_rows(
+        grid_simulation,
+        variable
+    ):
+        """
+        :return: Row positions of the given variable in the grid simulation, as Series indexed by the IDs.
+        """
+        row_positions = np.flatnonzero(grid_simulation.index.get_level_values(0) == variable)
+        return pd.Series(
+            data=row_positions,
+            index=grid_simulation.index.get_level_values(1)[row_positions]
+        )
+
+    # Method for simulating time windows in parallel processes ---------------------------------------------------------
+
+    def get_grid_simulation_parallel(
+        self,
+        ets_flow_time_array,
+        processes=None,
+        chunk_size=None
+    ):
+        """
+        Simulates the distribution system in a pool of processes, each simulating separate time windows. The grid
+        (including parameters and precomputed topology) is handed to each process once at its start, such that tasks
+        only carry the ETS flows of their time window. The result equals the one of get_grid_simulation.
+        :param ets_flow_time_array: ETS flows of all buildings (rows) over time (columns).
+        :param processes: number of processes, defaults to the number of CPUs.
+        :param chunk_size: number of time steps per window, defaults to an even split among the processes.
+        :return: grid simulation, as of get_grid_simulation.
+        """
+        if processes is None:
+            processes = os.cpu_count()
+        if len(ets_flow_time_array.columns) == 0:
+            # Nothing to distribute among the processes
+            return self.get_grid_simulation(ets_flow_time_array)
+
+        # Only distinct ETS flow columns are distributed among the processes
+        unique_positions, inverse_positions = self.get_unique_ets_flow_positions(ets_flow_time_array)
+        unique_ets_flow_time_array = ets_flow_time_array.iloc[:, unique_positions]
+        if chunk_size is None:
+            chunk_size = max(1, int(np.ceil(len(unique_positions) / processes)))
+        time_windows = [
+            unique_ets_flow_time_array.iloc[:, start:(start + chunk_size)]
+            for start in range(0, len(unique_positions), chunk_size)
+        ]
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=initialize_simulation_worker,
+            initargs=(self,)
+        ) as executor:
+            unique_grid_simulation = pd.concat(
+                list(executor.map(simulate_time_window, time_windows)),
+                axis=1
+            )
+
+        grid_simulation = unique_grid_simulation.iloc[:, inverse_positions]
+        grid_simulation.columns = ets_flow_time_array.columns
+        return grid_simulation
+
     # Methods used by optimizer  ---------------------------------------------------------------------------------------
 
     def get_heat_intake_from_ets_flow(
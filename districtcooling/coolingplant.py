@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 # ======================================================================================================================
@@ -34,15 +35,18 @@ class CoolingPlant:
 
     def get_cw_supply_temperature(
         self,
-        air_wet_bulb
+        air_wet_bulb,
+        cooling_plant=None
     ):
+        if cooling_plant is None:
+            cooling_plant = self.parameters.cooling_plant
         cw_supply_temperature = (
-            self.parameters.cooling_plant["CTS reference T CW supply [C]"]
+            cooling_plant["CTS reference T CW supply [C]"]
             + (
-                self.parameters.cooling_plant["CTS reference T slope [-]"]
+                cooling_plant["CTS reference T slope [-]"]
                 * (
                     air_wet_bulb
-                    - self.parameters.cooling_plant["CTS reference T wet-bulb [C]"]
+                    - cooling_plant["CTS reference T wet-bulb [C]"]
                 )
             )
         )
@@ -51,36 +55,44 @@ class CoolingPlant:
 
     def get_chillers_condensation_temperature(
         self,
-        air_wet_bulb
+        air_wet_bulb,
+        cooling_plant=None
     ):
+        if cooling_plant is None:
+            cooling_plant = self.parameters.cooling_plant
         cw_supply_temperature = self.get_cw_supply_temperature(
-            air_wet_bulb
+            air_wet_bulb,
+            cooling_plant
         )
         condensation_temperature = (
             cw_supply_temperature
             + 273.15
-            + self.parameters.cooling_plant["CW delta T [K]"]
-            + self.parameters.cooling_plant["chiller-set delta T cnd min [K]"]
+            + cooling_plant["CW delta T [K]"]
+            + cooling_plant["chiller-set delta T cnd min [K]"]
         )
         return condensation_temperature
 
     def get_chillers_inverse_cop(
         self,
-        air_wet_bulb
+        air_wet_bulb,
+        cooling_plant=None
     ):
+        if cooling_plant is None:
+            cooling_plant = self.parameters.cooling_plant
         condensation_temperature = self.get_chillers_condensation_temperature(
-            air_wet_bulb
+            air_wet_bulb,
+            cooling_plant
         )
         inverse_cop = (
             (
                 (
                     condensation_temperature
-                    / self.parameters.cooling_plant["chiller-set evaporation T [K]"]
+                    / cooling_plant["chiller-set evaporation T [K]"]
                 )
                 - 1
             )
             * (
-                self.parameters.cooling_plant["chiller-set beta [-]"]
+                cooling_plant["chiller-set beta [-]"]
                 + 1
             )
         )
@@ -89,11 +101,19 @@ class CoolingPlant:
     def get_chillers_power(
         self,
         chillers_water_flow,
-        air_wet_bulb
+        air_wet_bulb,
+        cooling_plant=None,
+        inverse_cop=None
     ):
-        inverse_cop = self.get_chillers_inverse_cop(
-            air_wet_bulb
-        )
+        """
+        :param inverse_cop: inverse COP of the chiller-set if already computed, as of get_chillers_inverse_cop, such
+        that it is not computed again, likewise for all getters depending on the chiller-set power.
+        """
+        if inverse_cop is None:
+            inverse_cop = self.get_chillers_inverse_cop(
+                air_wet_bulb,
+                cooling_plant
+            )
         power_chillers = (
             inverse_cop
             * self.get_chillers_evaporator_heat_flow(chillers_water_flow)
@@ -103,7 +123,9 @@ class CoolingPlant:
     def get_chillers_condenser_heat_flow(
         self,
         chillers_water_flow,
-        air_wet_bulb
+        air_wet_bulb,
+        cooling_plant=None,
+        inverse_cop=None
     ):
         condenser_heat_flow = (
             self.get_chillers_evaporator_heat_flow(
@@ -111,20 +133,25 @@ class CoolingPlant:
             )
             + self.get_chillers_power(
                 chillers_water_flow,
-                air_wet_bulb
+                air_wet_bulb,
+                cooling_plant,
+                inverse_cop
             )
         )
         return condenser_heat_flow
 
     def get_evaporator_pumping_power(
         self,
-        chillers_water_flow
+        chillers_water_flow,
+        cooling_plant=None
     ):
+       if cooling_plant is None:
+           cooling_plant = self.parameters.cooling_plant
        evaporator_pumping_power = (
-           (1 / self.parameters.cooling_plant["pumping total efficiency [-]"])
+           (1 / cooling_plant["pumping total efficiency [-]"])
             * self.parameters.physics["gravitational acceleration [m^2/s]"]
             * self.parameters.physics["water density [kg/m^3]"]
-            * self.parameters.cooling_plant["pump head evaporators [m]"]
+            * cooling_plant["pump head evaporators [m]"]
             * chillers_water_flow
        )
        return evaporator_pumping_power
@@ -134,11 +161,15 @@ class CoolingPlant:
     def get_CW_water_flow(
         self,
         chillers_water_flow,
-        air_wet_bulb
+        air_wet_bulb,
+        cooling_plant=None,
+        inverse_cop=None
     ):
         condenser_heat_flow = self.get_chillers_condenser_heat_flow(
             chillers_water_flow,
-            air_wet_bulb
+            air_wet_bulb,
+            cooling_plant,
+            inverse_cop
         )
         CW_water_flow = (
             condenser_heat_flow
@@ -152,17 +183,23 @@ class CoolingPlant:
     def get_CW_pumping_power(
         self,
         chillers_water_flow,
-        air_wet_bulb
+        air_wet_bulb,
+        cooling_plant=None,
+        inverse_cop=None
     ):
+        if cooling_plant is None:
+            cooling_plant = self.parameters.cooling_plant
         CW_water_flow = self.get_CW_water_flow(
             chillers_water_flow,
-            air_wet_bulb
+            air_wet_bulb,
+            cooling_plant,
+            inverse_cop
         )
         CW_pumping_power = (
-                (1 / self.parameters.cooling_plant["pumping total efficiency [-]"])
+                (1 / cooling_plant["pumping total efficiency [-]"])
                 * self.parameters.physics["gravitational acceleration [m^2/s]"]
                 * self.parameters.physics["water density [kg/m^3]"]
-                * self.parameters.cooling_plant["pump head CW [m]"]
+                * cooling_plant["pump head CW [m]"]
                 * CW_water_flow
         )
         return CW_pumping_power
@@ -172,14 +209,20 @@ class CoolingPlant:
     def get_CTS_ventilation_power(
         self,
         chillers_water_flow,
-        air_wet_bulb
+        air_wet_bulb,
+        cooling_plant=None,
+        inverse_cop=None
     ):
+        if cooling_plant is None:
+            cooling_plant = self.parameters.cooling_plant
         condenser_heat_flow = self.get_chillers_condenser_heat_flow(
             chillers_water_flow,
-            air_wet_bulb
+            air_wet_bulb,
+            cooling_plant,
+            inverse_cop
         )
         ventilation_power = (
-            self.parameters.cooling_plant["CTS ventilation factor [-]"]
+            cooling_plant["CTS ventilation factor [-]"]
             * condenser_heat_flow
         )
         return ventilation_power
@@ -188,40 +231,66 @@ class CoolingPlant:
 
     def get_TES_pumping_power(
         self,
-        TES_water_flow
+        TES_water_flow,
+        cooling_plant=None
     ):
+        if cooling_plant is None:
+            cooling_plant = self.parameters.cooling_plant
         TES_pumping_power = (
-                (1 / self.parameters.cooling_plant["pumping total efficiency [-]"])
+                (1 / cooling_plant["pumping total efficiency [-]"])
                 * self.parameters.physics["gravitational acceleration [m^2/s]"]
                 * self.parameters.physics["water density [kg/m^3]"]
-                * self.parameters.cooling_plant["pump head TES [m]"]
+                * cooling_plant["pump head TES [m]"]
                 * TES_water_flow
         )
         return TES_pumping_power
 
+    def get_TES_flow_cumulative_sums(
+        self,
+        TES_water_flow_set
+    ):
+        """
+        :param TES_water_flow_set: TES flows over time, as Series or dict indexed by the time steps of the environment.
+        :return: Series of the TES flows summed up until (including) every time step, which can be passed to
+        get_TES_flow_sum_until_time_step and get_TES_energy_content to avoid summing up the flows for every time step.
+        """
+        TES_water_flow_set = pd.Series(TES_water_flow_set, dtype=float)
+        missing_time_steps = self.parameters.environment.index.difference(TES_water_flow_set.index)
+        if len(missing_time_steps) > 0:
+            raise KeyError("TES flows are missing for time steps: " + ", ".join(map(str, missing_time_steps[:10])))
+        TES_flow_cumulative_sums = TES_water_flow_set.reindex(self.parameters.environment.index).cumsum()
+        return TES_flow_cumulative_sums
+
     def get_TES_flow_sum_until_time_step(
         self,
         time_step,
-        TES_water_flow_set
+        TES_water_flow_set,
+        TES_flow_cumulative_sums=None
     ):
-        TES_flow_sum_until_time_step = 0
-        for time in self.parameters.environment.index:
-            TES_flow_sum_until_time_step += (
-                TES_water_flow_set[time]
-            )
-            if time == time_step:
-                break
+        """
+        :param TES_flow_cumulative_sums: prefix sums of TES_water_flow_set as of get_TES_flow_cumulative_sums, computed
+        from TES_water_flow_set if not given. Queries of many time steps should compute them once and pass them, or
+        use get_TES_energy_content_time_series.
+        """
+        if TES_flow_cumulative_sums is None:
+            TES_flow_cumulative_sums = self.get_TES_flow_cumulative_sums(TES_water_flow_set)
+        if time_step in TES_flow_cumulative_sums.index:
+            TES_flow_sum_until_time_step = TES_flow_cumulative_sums[time_step]
+        else:
+            TES_flow_sum_until_time_step = TES_flow_cumulative_sums.iloc[-1]
         return TES_flow_sum_until_time_step
 
     def get_TES_energy_content(
         self,
         time_step,
         TES_water_flow_set,
-        TES_capacity_Wh
+        TES_capacity_Wh,
+        TES_flow_cumulative_sums=None
     ):
         TES_flow_sum_until_time_step = self.get_TES_flow_sum_until_time_step(
             time_step,
-            TES_water_flow_set
+            TES_water_flow_set,
+            TES_flow_cumulative_sums=TES_flow_cumulative_sums
         )
         # Calculate the energetic content of the storage
         TES_energy_content = (
@@ -236,6 +305,28 @@ class CoolingPlant:
         )
         return TES_energy_content
 
+    def get_TES_energy_content_time_series(
+        self,
+        TES_water_flow_set,
+        TES_capacity_Wh
+    ):
+        """
+        :param TES_water_flow_set: TES flows over time, as Series or dict indexed by the time steps of the environment.
+        :param TES_capacity_Wh: energy capacity of the TES.
+        :return: Series of the TES energy content at every time step, as of get_TES_energy_content.
+        """
+        TES_energy_content = (
+            TES_capacity_Wh
+            * self.parameters.cooling_plant["TES initial charge ratio [-]"]
+            + (
+                self.parameters.physics["water density [kg/m^3]"]
+                * self.parameters.physics["specific enthalpy difference DW [J/kg]"]
+                * self.parameters.physics["duration of one time step [h]"]
+                * self.get_TES_flow_cumulative_sums(TES_water_flow_set)
+            )
+        )
+        return TES_energy_content
+
     def get_storage_energy_change_optimization_rule(
         self,
         storage_flow
@@ -266,6 +357,30 @@ class CoolingPlant:
         )
         return plant_total_power
 
+    def get_plant_power_coefficients(
+        self
+    ):
+        """
+        The total power of the district cooling plant is linear in chiller-set flow and TES flow, with a coefficient of
+        the chiller-set flow depending on the air wet-bulb temperature.
+        :return: DataFrame of the total power per unit chiller-set flow and per unit TES flow, for every time step of
+        the environment.
+        """
+        plant_power_coefficients = pd.DataFrame(
+            data={
+                'Chiller-set power coefficient [W/(m3/s)]': self.get_plant_total_power(
+                    chillers_water_flow=1.0,
+                    storage_water_flow=0.0,
+                    air_wet_bulb=self.parameters.environment["Air wet-bulb temperature [°C]"].values
+                ),
+                'TES power coefficient [W/(m3/s)]': self.get_TES_pumping_power(
+                    TES_water_flow=1.0
+                )
+            },
+            index=self.parameters.environment.index
+        )
+        return plant_power_coefficients
+
     # Method triggering a complete simulation of the district cooling plant --------------------------------------------
 
     def get_plant_simulation(
@@ -343,4 +458,114 @@ class CoolingPlant:
                 'DCP total power demand [W]'
             ]
         )
-        return simulation
\ No newline at end of file
+        return simulation
+
+    # Method triggering a simulation of the district cooling plant for whole time series -------------------------------
+
+    def get_plant_simulation_time_array(
+        self,
+        chiller_set_flow,
+        tes_flow,
+        air_wet_bulb,
+        cooling_plant=None
+    ):
+        """
+        Simulates the district cooling plant for whole time series at once, evaluating the chiller-set's inverse COP
+        only once per time step.
+        :param chiller_set_flow: chiller-set flows in [m3/s], as scalar, array or Series over time.
+        :param tes_flow: TES flows in [m3/s], as scalar, array or Series over time.
+        :param air_wet_bulb: air wet-bulb temperatures in [C], as scalar, array or Series over time, e.g. the column
+        'Air wet-bulb temperature [°C]' of parameters.environment.
+        :param cooling_plant: parameters of the district cooling plant, defaults to parameters.cooling_plant. A
+        DataFrame with one scenario per row and the parameters as columns simulates all scenarios at once.
+        :return: DataFrame with the quantities of get_plant_simulation as columns and one row per time step, or per
+        scenario and time step if scenarios are given.
+        """
+        # Time index is taken from the first given Series
+        time_index = next(
+            (
+                value.index for value in [chiller_set_flow, tes_flow, air_wet_bulb]
+                if isinstance(value, pd.Series)
+            ),
+            None
+        )
+        chiller_set_flow, tes_flow, air_wet_bulb = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(chiller_set_flow, dtype=float)),
+            np.atleast_1d(np.asarray(tes_flow, dtype=float)),
+            np.atleast_1d(np.asarray(air_wet_bulb, dtype=float))
+        )
+        if time_index is None:
+            time_index = pd.RangeIndex(len(chiller_set_flow))
+
+        # Scenario parameters are broadcasted as column vectors (scenarios x 1) against the time series
+        if cooling_plant is None:
+            cooling_plant = self.parameters.cooling_plant
+        scenario_index = None
+        if isinstance(cooling_plant, pd.DataFrame):
+            scenario_index = cooling_plant.index
+            cooling_plant = {
+                parameter: cooling_plant[parameter].values[:, np.newaxis]
+                for parameter in cooling_plant.columns
+            }
+            chiller_set_flow, tes_flow, air_wet_bulb = [
+                np.broadcast_to(value, (len(scenario_index), len(time_index)))
+                for value in [chiller_set_flow, tes_flow, air_wet_bulb]
+            ]
+
+        # Chiller-set, whose inverse COP is computed once and passed to all getters depending on it
+        inverse_cop = np.broadcast_to(
+            self.get_chillers_inverse_cop(air_wet_bulb, cooling_plant),
+            chiller_set_flow.shape
+        )
+        evaporator_heat_flow = self.get_chillers_evaporator_heat_flow(chiller_set_flow)
+        chiller_set_power = self.get_chillers_power(chiller_set_flow, air_wet_bulb, cooling_plant, inverse_cop)
+        condenser_heat_flow = self.get_chillers_condenser_heat_flow(
+            chiller_set_flow,
+            air_wet_bulb,
+            cooling_plant,
+            inverse_cop
+        )
+
+        # Pumps and cooling towers
+        evaporator_pumping_power = self.get_evaporator_pumping_power(chiller_set_flow, cooling_plant)
+        condenser_water_flow = self.get_CW_water_flow(chiller_set_flow, air_wet_bulb, cooling_plant, inverse_cop)
+        condenser_pumping_power = self.get_CW_pumping_power(chiller_set_flow, air_wet_bulb, cooling_plant, inverse_cop)
+        cooling_towers_power = self.get_CTS_ventilation_power(
+            chiller_set_flow,
+            air_wet_bulb,
+            cooling_plant,
+            inverse_cop
+        )
+        storage_pumping_power = self.get_TES_pumping_power(tes_flow, cooling_plant)
+
+        plant_total_power = (
+            chiller_set_power
+            + evaporator_pumping_power
+            + condenser_pumping_power
+            + cooling_towers_power
+            + storage_pumping_power
+        )
+
+        if scenario_index is None:
+            index = time_index
+        else:
+            index = pd.MultiIndex.from_product([scenario_index, time_index])
+        simulation = pd.DataFrame(
+            data={
+                'Chiller-set flow in [m3/s]': chiller_set_flow.ravel(),
+                'TES flow in [m3/s]': tes_flow.ravel(),
+                'Air wet-bulb [C]': air_wet_bulb.ravel(),
+                'TES pumping power [W]': storage_pumping_power.ravel(),
+                'Evaporators pumping power [W]': evaporator_pumping_power.ravel(),
+                'Evaporator heat flow [W]': evaporator_heat_flow.ravel(),
+                'Chiller-Set COP^(-1) [-]': inverse_cop.ravel(),
+                'Chiller-Set Power [W]': chiller_set_power.ravel(),
+                'Condenser heat flow [W]': condenser_heat_flow.ravel(),
+                'Condenser water flow [m3/s]': condenser_water_flow.ravel(),
+                'Condenser pumping [W]': condenser_pumping_power.ravel(),
+                'CTS ventilation power [W]': cooling_towers_power.ravel(),
+                'DCP total power demand [W]': plant_total_power.ravel()
+            },
+            index=index
+        )
+        return simulation
@@ -0,0 +1,193 @@
+import numpy as np
+import scipy.optimize
+import scipy.sparse as sp
+
+# ======================================================================================================================
+# Linear problem in matrix form CLASS
+# ======================================================================================================================
+
+
+class MatrixProblem:
+    """
+    Linear problem assembled directly as sparse coefficient matrices, bounds and cost vector, minimizing
+    cost_vector * x subject to A_eq * x == b_eq, A_ub * x <= b_ub and the variables' bounds. Variables are added in
+    blocks over one or two index sets, constraints in blocks of rows. After solving, variables are accessed as in
+    Pyomo, e.g. problem.costs[time_step]() or problem.ets_flows_var[time_step, building_id]().
+    """
+
+    # INITIALIZATION ===================================================================================================
+
+    def __init__(
+        self,
+        name=None
+    ):
+        self.name = name
+        self.variables = {}
+        self.variable_count = 0
+        self.lower_bounds = []
+        self.upper_bounds = []
+        self.cost_vector_blocks = {}
+        self.constraint_blocks = {'eq': [], 'ub': []}
+        self.right_hand_sides = {'eq': [], 'ub': []}
+        self.constraint_counts = {'eq': 0, 'ub': 0}
+        self.solver_result = None
+        self.values = None
+
+    # METHOD DEFINITIONS ===============================================================================================
+
+    def add_variable(
+        self,
+        name,
+        index_set,
+        other_index_set=None,
+        lower_bound=-np.inf,
+        upper_bound=np.inf
+    ):
+        """
+        Adds a block of variables over index_set (e.g. time steps) or over index_set x other_index_set (e.g. time steps
+        x building IDs), in row-major order, as attribute of given name.
+        :param lower_bound, upper_bound: bounds as scalars or as arrays of the block's shape.
+        :return: MatrixVariable.
+        """
+        variable = MatrixVariable(self, self.variable_count, index_set, other_index_set)
+        self.variable_count += variable.size
+        self.lower_bounds.append(np.broadcast_to(np.asarray(lower_bound, dtype=float), variable.shape).ravel())
+        self.upper_bounds.append(np.broadcast_to(np.asarray(upper_bound, dtype=float), variable.shape).ravel())
+        self.variables[name] = variable
+        setattr(self, name, variable)
+        return variable
+
+    def add_constraints(
+        self,
+        terms,
+        right_hand_side,
+        sense='eq'
+    ):
+        """
+        Adds a block of constraints sum(coefficients * variable for variable, coefficients in terms) == (or <=)
+        right_hand_side.
+        :param terms: list of tuples of a MatrixVariable and its coefficient matrix (constraints x variable size).
+        :param right_hand_side: scalar or array of the block's constraint count.
+        :param sense: 'eq' for equality, 'ub' for upper bound constraints.
+        """
+        constraint_count = terms[0][1].shape[0]
+        for variable, coefficients in terms:
+            coefficients = sp.coo_matrix(coefficients)
+            self.constraint_blocks[sense].append(
+                (
+                    coefficients.row + self.constraint_counts[sense],
+                    coefficients.col + variable.offset,
+                    coefficients.data
+                )
+            )
+        self.right_hand_sides[sense].append(
+            np.broadcast_to(np.asarray(right_hand_side, dtype=float), (constraint_count,))
+        )
+        self.constraint_counts[sense] += constraint_count
+
+    def add_cost(
+        self,
+        variable,
+        cost
+    ):
+        self.cost_vector_blocks[variable.offset] = (
+            variable,
+            np.broadcast_to(np.asarray(cost, dtype=float), variable.shape)
+        )
+
+    def get_constraint_matrix(
+        self,
+        sense
+    ):
+        """
+        :return: sparse constraint matrix (CSR) and right-hand side of given sense.
+        """
+        blocks = self.constraint_blocks[sense]
+        matrix = sp.csr_matrix(
+            (
+                np.concatenate([block[2] for block in blocks] + [np.zeros(0)]),
+                (
+                    np.concatenate([block[0] for block in blocks] + [np.zeros(0, dtype=int)]),
+                    np.concatenate([block[1] for block in blocks] + [np.zeros(0, dtype=int)])
+                )
+            ),
+            shape=(self.constraint_counts[sense], self.variable_count)
+        )
+        right_hand_side = np.concatenate(self.right_hand_sides[sense] + [np.zeros(0)])
+        return matrix, right_hand_side
+
+    def get_cost_vector(
+        self
+    ):
+        cost_vector = np.zeros(self.variable_count)
+        for variable, cost in self.cost_vector_blocks.values():
+            cost_vector[variable.offset:(variable.offset + variable.size)] = cost.ravel()
+        return cost_vector
+
+    def solve(
+        self
+    ):
+        """
+        Solves the problem in bulk by the HiGHS solver of SciPy.
+        :return: solver result, as of scipy.optimize.linprog.
+        """
+        equality_matrix, equality_right_hand_side = self.get_constraint_matrix('eq')
+        inequality_matrix, inequality_right_hand_side = self.get_constraint_matrix('ub')
+        self.solver_result = scipy.optimize.linprog(
+            c=self.get_cost_vector(),
+            A_ub=inequality_matrix if self.constraint_counts['ub'] > 0 else None,
+            b_ub=inequality_right_hand_side if self.constraint_counts['ub'] > 0 else None,
+            A_eq=equality_matrix if self.constraint_counts['eq'] > 0 else None,
+            b_eq=equality_right_hand_side if self.constraint_counts['eq'] > 0 else None,
+            bounds=np.column_stack([np.concatenate(self.lower_bounds), np.concatenate(self.upper_bounds)]),
+            method='highs'
+        )
+        if not self.solver_result.success:
+            raise RuntimeError("Linear problem could not be solved: " + self.solver_result.message)
+        self.values = self.solver_result.x
+        return self.solver_result
+
+    def objective(
+        self
+    ):
+        return None if self.solver_result is None else self.solver_result.fun
+
+
+class MatrixVariable:
+    """
+    Block of variables of a MatrixProblem, indexed as Pyomo variables by an element of its index set or by a tuple of
+    elements of both index sets. Indexing returns a callable, which returns the variable's value after solving.
+    """
+
+    def __init__(
+        self,
+        problem,
+        offset,
+        index_set,
+        other_index_set=None
+    ):
+        self.problem = problem
+        self.offset = offset
+        self.index_positions = {index: position for position, index in enumerate(index_set)}
+        if other_index_set is None:
+            self.other_index_positions = None
+            self.shape = (len(self.index_positions),)
+        else:
+            self.other_index_positions = {index: position for position, index in enumerate(other_index_set)}
+            self.shape = (len(self.index_positions), len(self.other_index_positions))
+        self.size = int(np.prod(self.shape))
+
+    def __getitem__(self, key):
+        if self.other_index_positions is None:
+            position = self.index_positions[key]
+        else:
+            position = self.index_positions[key[0]] * self.shape[1] + self.other_index_positions[key[1]]
+        return lambda: None if self.problem.values is None else float(self.problem.values[self.offset + position])
+
+    def get_values(
+        self
+    ):
+        """
+        :return: values of all variables of the block, as array of the block's shape.
+        """
+        return self.problem.values[self.offset:(self.offset + self.size)].reshape(self.shape)
@@ -1,6 +1,10 @@
+import numpy as np
 import os
 import pandas as pd
 import pyomo.environ as py
+import scipy.sparse as sp
+from districtcooling.matrixproblem import MatrixProblem
+from districtcooling.stackedbuildings import StackedBuildings, get_building_matrices
 
 # ======================================================================================================================
 # Linear optimization of district cooling system's load-curve CLASS
@@ -30,19 +34,80 @@ class LinearOptimizer:
         self.modelled_plant = coolingplant
         self.modelled_buildings_dict = buildings_dict
 
+        # Node-line adjacency and node-types of the grid ---------------------------------------------------------------
+        """ IDs of inflowing and outflowing lines and type of every node, which do not depend on time and are hence
+        only looked up by the nodal flow balances """
+        compiled_grid = self.modelled_grid.compiled_grid
+        self.node_inflowing_line_ids = {}
+        self.node_outflowing_line_ids = {}
+        self.node_types = {}
+        for node_position, node_id in enumerate(compiled_grid.node_ids.tolist()):
+            line_positions, line_signs = compiled_grid.get_node_lines(node_position)
+            self.node_inflowing_line_ids[node_id] = compiled_grid.line_ids[line_positions[line_signs > 0]].tolist()
+            self.node_outflowing_line_ids[node_id] = compiled_grid.line_ids[line_positions[line_signs < 0]].tolist()
+            self.node_types[node_id] = compiled_grid.node_types[compiled_grid.node_type_codes[node_position]]
+
+        # Sparse matrices of buildings ---------------------------------------------------------------------------------
+        """ State-space matrices, disturbances and output bounds of every building, converted once """
+        self.building_matrices_dict = {
+            building_id: get_building_matrices(building, self.parameters.environment.index)
+            for building_id, building in self.modelled_buildings_dict.items()
+        }
+
         # Create Gurobi-Solver -----------------------------------------------------------------------------------------
         self.solver = py.SolverFactory('gurobi')
 
+        # Persistent problem and solver, as of set_up_problem
+        self.problem = None
+        self.persistent_solver = None
+
     # METHOD DEFINITIONS ===============================================================================================
 
     # Methods building the PYOMO problem -------------------------------------------------------------------------------
 
     def build_and_solve_problem(
+        self,
+        ds_head_differences_time_array,
+        TES_capacity_Wh,
+        distributed_secondary_pumping=False,
+        backend='pyomo'
+    ):
+        """
+        :param backend: 'pyomo' builds the problem by Pyomo rules and solves it by self.solver, 'matrix' assembles the
+        same problem in matrix form, as of build_and_solve_matrix_problem.
+        """
+        if backend == 'matrix':
+            return self.build_and_solve_matrix_problem(
+                ds_head_differences_time_array,
+                TES_capacity_Wh,
+                distributed_secondary_pumping=distributed_secondary_pumping
+            )
+        elif backend != 'pyomo':
+            raise ValueError("Unknown backend: " + str(backend))
+
+        problem = self.build_problem(
+            ds_head_differences_time_array,
+            TES_capacity_Wh,
+            distributed_secondary_pumping=distributed_secondary_pumping
+        )
+
+        # Give problem to solver and let it solve ----------------------------------------------------------------------
+        self.solver.solve(problem, tee=False)
+
+        # Return the solved problem ------------------------------------------------------------------------------------
+        return problem
+
+    def build_problem(
         self,
         ds_head_differences_time_array,
         TES_capacity_Wh,
         distributed_secondary_pumping=False
     ):
+        """
+        Builds the Pyomo problem. TES capacity, initial and terminal charge ratio, energy prices, ETS head differences
+        and the pumping scheme are mutable parameters of the problem, which can be changed by update_problem.
+        :return: Pyomo problem.
+        """
         # Create PYOMO-Problem -----------------------------------------------------------------------------------------
         problem = py.ConcreteModel(
             name="OptimalLoadCurve"
@@ -66,6 +131,42 @@ class LinearOptimizer:
             ordered=True
         )
 
+        # Create mutable PYOMO-Parameters ------------------------------------------------------------------------------
+        problem.TES_capacity_Wh = py.Param(
+            initialize=TES_capacity_Wh,
+            mutable=True
+        )
+        problem.TES_initial_charge_ratio = py.Param(
+            initialize=self.parameters.cooling_plant["TES initial charge ratio [-]"],
+            mutable=True
+        )
+        problem.TES_terminal_charge_ratio = py.Param(
+            initialize=self.parameters.cooling_plant["TES terminal charge ratio [-]"],
+            mutable=True
+        )
+        problem.energy_prices = py.Param(
+            problem.time_set,
+            initialize=self.parameters.environment["Price [S$/MWh]"].to_dict(),
+            mutable=True
+        )
+        problem.ets_head_differences = py.Param(
+            problem.time_set,
+            problem.building_ids,
+            initialize=0.0,
+            mutable=True
+        )
+        problem.maximum_ets_head_differences = py.Param(
+            problem.time_set,
+            initialize=0.0,
+            mutable=True
+        )
+        self.set_ets_head_differences(problem, ds_head_differences_time_array)
+        """ 1 for distributed secondary pumping, 0 for central secondary pumping """
+        problem.distributed_secondary_pumping = py.Param(
+            initialize=float(distributed_secondary_pumping),
+            mutable=True
+        )
+
         # Create PYOMO-Variables ---------------------------------------------------------------------------------------
         problem.chillers_flow_var = py.Var(
             problem.time_set,
@@ -117,7 +218,7 @@ class LinearOptimizer:
             problem.time_set,
             domain=py.NegativeReals,
             bounds=(
-                TES_capacity_Wh,
+                problem.TES_capacity_Wh,
                 0
             )
         )
@@ -126,12 +227,12 @@ class LinearOptimizer:
             problem,
             time_step
         ):
-            if time_step == 1:
+            if time_step == problem.time_set.first():
                 rule = (
                     problem.storage_energy_content[time_step]
                     == (
-                            TES_capacity_Wh
-                            * self.parameters.cooling_plant["TES initial charge ratio [-]"]
+                            problem.TES_capacity_Wh
+                            * problem.TES_initial_charge_ratio
                             + self.modelled_plant.get_storage_energy_change_optimization_rule(
                             problem.storage_flow_var[time_step]
                         )
@@ -160,8 +261,8 @@ class LinearOptimizer:
             rule = (
                 problem.storage_energy_content[problem.time_set[-1]]
                 == (
-                        TES_capacity_Wh
-                        * self.parameters.cooling_plant["TES terminal charge ratio [-]"]
+                        problem.TES_capacity_Wh
+                        * problem.TES_terminal_charge_ratio
                 )
             )
             return rule
@@ -202,22 +303,20 @@ class LinearOptimizer:
         )
         """ 2. Total flow demand, the line's flows and building's water consumptions are all linked through the nodal 
         flow balances of the digraph"""
+        compiled_grid = self.modelled_grid.compiled_grid
+
         def nodal_flow_balances_of_grid_rule(
             problem,
             time_step,
             node_id
         ):
-            # Find IDs of all inflowing and outflowing lines of current node
-            inflowing_lines = []
-            outflowing_lines = []
-            for line_id in self.parameters.lines.index:
-                if self.modelled_grid.incidence_matrix_complete[node_id][line_id] == -1:
-                    outflowing_lines.append(line_id)
-                if self.modelled_grid.incidence_matrix_complete[node_id][line_id] == 1:
-                    inflowing_lines.append(line_id)
+            # Look up IDs of all inflowing and outflowing lines of current node
+            inflowing_lines = self.node_inflowing_line_ids[node_id]
+            outflowing_lines = self.node_outflowing_line_ids[node_id]
 
             # Create nodal flow balance equations in dependence of node-type
-            if self.parameters.nodes["Type"][node_id] == "building":
+            node_type = self.node_types[node_id]
+            if node_type == "building":
                 rule = (
                     problem.ets_flows_var[time_step, node_id]
                     == (
@@ -225,7 +324,7 @@ class LinearOptimizer:
                         - py.quicksum(problem.lines_flow[time_step, line_id] for line_id in outflowing_lines)
                     )
                 )
-            elif self.parameters.nodes["Type"][node_id] == "junction":
+            elif node_type == "junction":
                 rule = (
                     0
                     == (
@@ -233,7 +332,7 @@ class LinearOptimizer:
                         - py.quicksum(problem.lines_flow[time_step, line_id] for line_id in outflowing_lines)
                     )
                 )
-            elif self.parameters.nodes["Type"][node_id] == "reference":
+            elif node_type == "reference":
                 rule = (
                     - problem.total_flow_demand[time_step]
                     == (
@@ -271,7 +370,7 @@ class LinearOptimizer:
                     problem.lines_velocity[time_step, line_id]
                     == self.modelled_grid.get_pipe_velocity(
                         pipe_flow=problem.lines_flow[time_step, line_id],
-                        pipe_diameter=self.parameters.lines["Diameter [m]"][line_id]
+                        pipe_diameter=compiled_grid.line_diameters[compiled_grid.line_positions[line_id]]
                     )
             )
             return rule
@@ -403,33 +502,36 @@ class LinearOptimizer:
             ],
             domain=py.NonNegativeReals
         )
-        """ 2. State equation is defined"""
+        """ 2. State equation is defined, with only the nonzero terms of the buildings' sparse matrices and the
+        disturbance contributions of all time steps precomputed """
+        time_steps = list(problem.time_set)
         problem.building_state_equation_constraints = py.ConstraintList()
         for building_id, building in self.modelled_buildings_dict.items():
-            for state in building.set_states:
-                for timestep in problem.time_set:
-                    if timestep != problem.time_set[-1]:
-                        problem.building_state_equation_constraints.add(
-                            problem.variable_state_timeseries[timestep + 1, (building_id, state)]
-                            ==
-                            (
-                                py.quicksum(
-                                    building.state_matrix.loc[state, state_other]
-                                    * problem.variable_state_timeseries[timestep, (building_id, state_other)]
-                                    for state_other in building.set_states
-                                )
-                                + py.quicksum(
-                                    building.control_matrix.loc[state, control]
-                                    * problem.variable_control_timeseries[timestep, (building_id, control)]
-                                    for control in building.set_controls
-                                )
-                                + py.quicksum(
-                                    building.disturbance_matrix.loc[state, disturbance]
-                                    * building.disturbance_timeseries.loc[building.set_timesteps[timestep - 1], disturbance]
-                                    for disturbance in building.set_disturbances
-                                )
+            building_matrices = self.building_matrices_dict[building_id]
+            states = list(building.set_states)
+            controls = list(building.set_controls)
+            state_disturbance_contribution = building_matrices['D'] @ building_matrices['disturbances'].transpose()
+            for state_position, state in enumerate(states):
+                state_terms = self.get_sparse_row_terms(building_matrices['A'], state_position, states)
+                control_terms = self.get_sparse_row_terms(building_matrices['B'], state_position, controls)
+                for time_position, timestep in enumerate(time_steps[:-1]):
+                    problem.building_state_equation_constraints.add(
+                        problem.variable_state_timeseries[timestep + 1, (building_id, state)]
+                        ==
+                        (
+                            py.quicksum(
+                                coefficient
+                                * problem.variable_state_timeseries[timestep, (building_id, state_other)]
+                                for state_other, coefficient in state_terms
                             )
+                            + py.quicksum(
+                                coefficient
+                                * problem.variable_control_timeseries[timestep, (building_id, control)]
+                                for control, coefficient in control_terms
+                            )
+                            + state_disturbance_contribution[state_position, time_position]
                         )
+                    )
 
         # CONSTRAINT 9.1: Buildings' output equation constraint
         """ 1. Output vector timeseries is instantiated as variable"""
@@ -442,51 +544,58 @@ class LinearOptimizer:
             ],
             domain=py.Reals
         )
-        """ 2. Output equation is defined"""
+        """ 2. Output equation is defined, with only the nonzero terms as for the state equation"""
         problem.building_output_equation_constraints = py.ConstraintList()
         for building_id, building in self.modelled_buildings_dict.items():
-            for output in building.set_outputs:
-                for timestep in problem.time_set:
+            building_matrices = self.building_matrices_dict[building_id]
+            states = list(building.set_states)
+            controls = list(building.set_controls)
+            output_disturbance_contribution = building_matrices['F'] @ building_matrices['disturbances'].transpose()
+            for output_position, output in enumerate(building.set_outputs):
+                state_terms = self.get_sparse_row_terms(building_matrices['C'], output_position, states)
+                control_terms = self.get_sparse_row_terms(building_matrices['E'], output_position, controls)
+                for time_position, timestep in enumerate(time_steps):
                     problem.building_output_equation_constraints.add(
                         problem.variable_output_timeseries[timestep, (building_id, output)]
                         ==
                         (
                             py.quicksum(
-                                building.state_output_matrix.loc[output, state]
+                                coefficient
                                 * problem.variable_state_timeseries[timestep, (building_id, state)]
-                                for state in building.set_states
+                                for state, coefficient in state_terms
                             )
                             + py.quicksum(
-                                building.control_output_matrix.loc[output, control]
+                                coefficient
                                 * problem.variable_control_timeseries[timestep, (building_id, control)]
-                                for control in building.set_controls
-                            )
-                            + py.quicksum(
-                                building.disturbance_output_matrix.loc[output, disturbance]
-                                * building.disturbance_timeseries.loc[building.set_timesteps[timestep - 1], disturbance]
-                                for disturbance in building.set_disturbances
+                                for control, coefficient in control_terms
                             )
+                            + output_disturbance_contribution[output_position, time_position]
                         )
                     )
 
         # CONSTRAINT 9.2: Output vector minimum / maximum constraint
-        """ 1. Minimum / maximum constraints are defined"""
+        """ 1. Minimum / maximum constraints are defined, infinite bounds are omitted"""
         problem.building_output_bounds_constraints = py.ConstraintList()
         for building_id, building in self.modelled_buildings_dict.items():
-            for output in building.set_outputs:
-                for timestep in problem.time_set:
+            building_matrices = self.building_matrices_dict[building_id]
+            for output_position, output in enumerate(building.set_outputs):
+                for time_position, timestep in enumerate(time_steps):
+                    output_minimum = building_matrices['output_minimum'][time_position, output_position]
+                    output_maximum = building_matrices['output_maximum'][time_position, output_position]
                     # Minimum.
-                    problem.building_output_bounds_constraints.add(
-                        problem.variable_output_timeseries[timestep, (building_id, output)]
-                        >=
-                        building.output_constraint_timeseries_minimum.loc[building.set_timesteps[timestep - 1], output]
-                    )
+                    if np.isfinite(output_minimum):
+                        problem.building_output_bounds_constraints.add(
+                            problem.variable_output_timeseries[timestep, (building_id, output)]
+                            >=
+                            output_minimum
+                        )
                     # Maximum.
-                    problem.building_output_bounds_constraints.add(
-                        problem.variable_output_timeseries[timestep, (building_id, output)]
-                        <=
-                        building.output_constraint_timeseries_maximum.loc[building.set_timesteps[timestep - 1], output]
-                    )
+                    if np.isfinite(output_maximum):
+                        problem.building_output_bounds_constraints.add(
+                            problem.variable_output_timeseries[timestep, (building_id, output)]
+                            <=
+                            output_maximum
+                        )
 
         # CONSTRAINT 10: Connect building to grid
         """ 1. Building heat flow from grid constraint is defined"""
@@ -512,16 +621,19 @@ class LinearOptimizer:
         )
         """ 2. District cooling plant's total electric power consumption is linked with the two variables of chiller-set
          flow and thermal energy storage flow """
+        plant_power_coefficients = self.modelled_plant.get_plant_power_coefficients()
+        chillers_power_coefficients = plant_power_coefficients['Chiller-set power coefficient [W/(m3/s)]'].to_dict()
+        storage_power_coefficient = float(plant_power_coefficients['TES power coefficient [W/(m3/s)]'].iloc[0])
+
         def district_cooling_plant_total_power_rule(
             problem,
             time_step
         ):
             rule = (
                     problem.district_cooling_plant_total_power[time_step]
-                    == self.modelled_plant.get_plant_total_power(
-                        problem.chillers_flow_var[time_step],
-                        problem.storage_flow_var[time_step],
-                        self.parameters.environment["Air wet-bulb temperature [°C]"][time_step]
+                    == (
+                        chillers_power_coefficients[time_step] * problem.chillers_flow_var[time_step]
+                        + storage_power_coefficient * problem.storage_flow_var[time_step]
                     )
             )
             return rule
@@ -541,42 +653,7 @@ class LinearOptimizer:
         for the distribution system:
             - central secondary pumping (False)
             - or distributed secondary pumping (True) """
-        def distribution_system_pumping_power_rule(
-            problem,
-            time_step
-        ):
-            # Distributed Secondary Pumping
-            if distributed_secondary_pumping:
-                rule = (
-                    problem.distribution_system_total_power[time_step]
-                    == py.quicksum(
-                        (1 / self.parameters.distribution_system["pump efficiency secondary pump [-]"])
-                        * self.parameters.physics["water density [kg/m^3]"]
-                        * self.parameters.physics["gravitational acceleration [m^2/s]"]
-                        * ds_head_differences_time_array[str(time_step)][building_id]
-                        * problem.ets_flows_var[time_step, building_id]
-                        for building_id in problem.building_ids
-                    )
-                )
-                return rule
-            # Central Secondary Pumping
-            else:
-                rule = (
-                    problem.distribution_system_total_power[time_step]
-                    == (
-                            (1 / self.parameters.distribution_system["pump efficiency secondary pump [-]"])
-                            * self.parameters.physics["water density [kg/m^3]"]
-                            * self.parameters.physics["gravitational acceleration [m^2/s]"]
-                            * ds_head_differences_time_array[str(time_step)].max()
-                            * problem.total_flow_demand[time_step]
-                    )
-                )
-                return rule
-
-        problem.distribution_system_pumping_power_constraint = py.Constraint(
-            problem.time_set,
-            rule=distribution_system_pumping_power_rule
-        )
+        self.add_distribution_system_pumping_power_constraint(problem)
 
         # CONSTRAINT 13: Introduce total power DCS in MW
         """ 1. DCS's total electric power consumption is introduced as pseudo-variables in MW"""
@@ -621,7 +698,7 @@ class LinearOptimizer:
                     problem.costs[time_step]
                     == (
                         problem.dcs_total_power[time_step]
-                        * self.parameters.environment["Price [S$/MWh]"][time_step]
+                        * problem.energy_prices[time_step]
                         * self.parameters.physics["duration of one time step [h]"]
                     )
             )
@@ -651,10 +728,535 @@ class LinearOptimizer:
             sense=1
         )
 
-        # Give problem to solver and let it solve ----------------------------------------------------------------------
-        self.solver.solve(problem, tee=False)
+        return problem
 
-        # Return the solved problem ------------------------------------------------------------------------------------
+    @staticmethod
+    def set_ets_head_differences(
+        problem,
+        ds_head_differences_time_array
+    ):
+        """
+        Sets the ETS head differences (buildings x time steps, with time steps as strings) and their maxima over all
+        buildings as values of the mutable parameters of the problem.
+        """
+        head_differences = ds_head_differences_time_array[[str(time_step) for time_step in problem.time_set]]
+        maximum_head_differences = head_differences.max()
+        head_differences = head_differences.loc[list(problem.building_ids)]
+        for time_step in problem.time_set:
+            problem.maximum_ets_head_differences[time_step] = float(maximum_head_differences[str(time_step)])
+            for building_id, head_difference in head_differences[str(time_step)].items():
+                problem.ets_head_differences[time_step, building_id] = float(head_difference)
+
+    def add_distribution_system_pumping_power_constraint(
+        self,
+        problem
+    ):
+        """
+        Adds the constraint of the distribution system's pumping power for the problem's current pumping scheme, with
+        terms of all ETS flows only for distributed secondary pumping. Rebuilt by update_problem if the pumping scheme
+        changes.
+        """
+        distributed_secondary_pumping = (py.value(problem.distributed_secondary_pumping) == 1)
+
+        def distribution_system_pumping_power_rule(
+            problem,
+            time_step
+        ):
+            # Distributed Secondary Pumping
+            if distributed_secondary_pumping:
+                rule = (
+                    problem.distribution_system_total_power[time_step]
+                    == py.quicksum(
+                        (1 / self.parameters.distribution_system["pump efficiency secondary pump [-]"])
+                        * self.parameters.physics["water density [kg/m^3]"]
+                        * self.parameters.physics["gravitational acceleration [m^2/s]"]
+                        * problem.ets_head_differences[time_step, building_id]
+                        * problem.ets_flows_var[time_step, building_id]
+                        for building_id in problem.building_ids
+                    )
+                )
+                return rule
+            # Central Secondary Pumping
+            else:
+                rule = (
+                    problem.distribution_system_total_power[time_step]
+                    == (
+                            (1 / self.parameters.distribution_system["pump efficiency secondary pump [-]"])
+                            * self.parameters.physics["water density [kg/m^3]"]
+                            * self.parameters.physics["gravitational acceleration [m^2/s]"]
+                            * problem.maximum_ets_head_differences[time_step]
+                            * problem.total_flow_demand[time_step]
+                    )
+                )
+                return rule
+
+        problem.distribution_system_pumping_power_constraint = py.Constraint(
+            problem.time_set,
+            rule=distribution_system_pumping_power_rule
+        )
+
+    # Methods of the persistent problem --------------------------------------------------------------------------------
+
+    def set_up_problem(
+        self,
+        ds_head_differences_time_array,
+        TES_capacity_Wh,
+        distributed_secondary_pumping=False,
+        solver_name=None
+    ):
+        """
+        Builds the problem once and hands it to a persistent solver, such that scenario sweeps only change the mutable
+        parameters by update_problem and re-solve by solve_persistent_problem, warm-started from the previous basis.
+        :param solver_name: name of a persistent solver of Pyomo, e.g. 'gurobi_persistent' or 'appsi_highs', defaults
+        to the persistent variant of self.solver with its options, e.g. 'gurobi_persistent' for 'gurobi'.
+        :return: Pyomo problem.
+        """
+        if solver_name is None:
+            if hasattr(self.solver, 'set_instance'):
+                # Persistent itself (e.g. APPSI solvers), a separate instance is bound to the problem
+                persistent_solver = type(self.solver)()
+            elif (self.solver.name + '_persistent') in py.SolverFactory:
+                persistent_solver = py.SolverFactory(self.solver.name + '_persistent')
+            else:
+                raise ValueError("Solver has no persistent variant: " + str(self.solver.name))
+            persistent_solver.options.update(self.solver.options)
+        else:
+            persistent_solver = py.SolverFactory(solver_name)
+            if not hasattr(persistent_solver, 'set_instance'):
+                raise ValueError("Solver is not persistent: " + str(solver_name))
+
+        self.problem = self.build_problem(
+            ds_head_differences_time_array,
+            TES_capacity_Wh,
+            distributed_secondary_pumping=distributed_secondary_pumping
+        )
+        self.persistent_solver = persistent_solver
+        self.persistent_solver.set_instance(self.problem)
+        return self.problem
+
+    def update_problem(
+        self,
+        TES_capacity_Wh=None,
+        TES_initial_charge_ratio=None,
+        TES_terminal_charge_ratio=None,
+        energy_prices=None,
+        ds_head_differences_time_array=None,
+        distributed_secondary_pumping=None
+    ):
+        """
+        Changes mutable parameters of the persistent problem, arguments left None are kept. Only the variable bounds
+        and constraints depending on changed parameters are updated in the persistent solver, the pumping power
+        constraint is rebuilt if the pumping scheme changes.
+        :param energy_prices: prices in [S$/MWh] per time step, as Series or dict.
+        """
+        problem = self.problem
+        first_time_step = problem.time_set.first()
+        updated_variables = []
+        updated_constraints = []
+
+        if TES_capacity_Wh is not None:
+            problem.TES_capacity_Wh = TES_capacity_Wh
+            updated_variables.extend(problem.storage_energy_content.values())
+            updated_constraints.append(problem.storage_flow_and_energy_content_constraint[first_time_step])
+            updated_constraints.append(problem.storage_terminal_charge_constraint)
+        if TES_initial_charge_ratio is not None:
+            problem.TES_initial_charge_ratio = TES_initial_charge_ratio
+            updated_constraints.append(problem.storage_flow_and_energy_content_constraint[first_time_step])
+        if TES_terminal_charge_ratio is not None:
+            problem.TES_terminal_charge_ratio = TES_terminal_charge_ratio
+            updated_constraints.append(problem.storage_terminal_charge_constraint)
+        if energy_prices is not None:
+            for time_step in problem.time_set:
+                problem.energy_prices[time_step] = float(energy_prices[time_step])
+            updated_constraints.extend(problem.costs_constraint.values())
+        if ds_head_differences_time_array is not None:
+            self.set_ets_head_differences(problem, ds_head_differences_time_array)
+            updated_constraints.extend(problem.distribution_system_pumping_power_constraint.values())
+        if (
+            (distributed_secondary_pumping is not None)
+            and (float(distributed_secondary_pumping) != py.value(problem.distributed_secondary_pumping))
+        ):
+            problem.distributed_secondary_pumping = float(distributed_secondary_pumping)
+            # Replaced as a whole, hence not updated constraint by constraint
+            pumping_power_constraints = list(problem.distribution_system_pumping_power_constraint.values())
+            pumping_power_constraint_ids = {id(constraint) for constraint in pumping_power_constraints}
+            updated_constraints = [
+                constraint for constraint in updated_constraints if id(constraint) not in pumping_power_constraint_ids
+            ]
+            if hasattr(self.persistent_solver, 'update_var'):
+                for constraint in pumping_power_constraints:
+                    self.persistent_solver.remove_constraint(constraint)
+            problem.del_component(problem.distribution_system_pumping_power_constraint)
+            self.add_distribution_system_pumping_power_constraint(problem)
+            if hasattr(self.persistent_solver, 'update_var'):
+                for constraint in problem.distribution_system_pumping_power_constraint.values():
+                    self.persistent_solver.add_constraint(constraint)
+
+        # Persistent solvers with update_var are updated explicitly, others (APPSI) detect changes when solving
+        if hasattr(self.persistent_solver, 'update_var'):
+            for variable in updated_variables:
+                self.persistent_solver.update_var(variable)
+            for constraint in {id(constraint): constraint for constraint in updated_constraints}.values():
+                self.persistent_solver.remove_constraint(constraint)
+                self.persistent_solver.add_constraint(constraint)
+
+    def solve_persistent_problem(
+        self
+    ):
+        """
+        :return: the persistent problem, solved with its current parameters.
+        """
+        if hasattr(self.persistent_solver, 'update_var'):
+            self.persistent_solver.solve(tee=False)
+        else:
+            self.persistent_solver.solve(self.problem)
+        return self.problem
+
+    @staticmethod
+    def get_sparse_row_terms(
+        matrix,
+        row,
+        column_labels
+    ):
+        """
+        :return: list of tuples of column label and coefficient of all nonzero entries of a row of a CSR matrix.
+        """
+        entries = slice(matrix.indptr[row], matrix.indptr[row + 1])
+        return [
+            (column_labels[column], float(coefficient))
+            for column, coefficient in zip(matrix.indices[entries], matrix.data[entries])
+        ]
+
+    def build_and_solve_matrix_problem(
+        self,
+        ds_head_differences_time_array,
+        TES_capacity_Wh,
+        distributed_secondary_pumping=False
+    ):
+        """
+        Builds the problem of build_and_solve_problem directly as sparse coefficient matrices, bounds and cost vector,
+        with all time steps of a constraint assembled at once, and solves it in bulk by the HiGHS solver of SciPy.
+        :return: solved MatrixProblem, with the variables and sets of the Pyomo problem, which can be passed to
+        get_solution_as_dataframe.
+        """
+        problem = MatrixProblem(
+            name="OptimalLoadCurve"
+        )
+
+        # Sets ---------------------------------------------------------------------------------------------------------
+        time_steps = self.parameters.environment.index
+        problem.time_set = time_steps.tolist()
+        problem.building_ids = self.parameters.buildings.index.tolist()
+        problem.line_ids = self.parameters.lines.index.tolist()
+        problem.node_ids = self.parameters.nodes.index.tolist()
+        compiled_grid = self.modelled_grid.compiled_grid
+        stacked_buildings = StackedBuildings(self.parameters, self.modelled_buildings_dict)
+
+        # Constraints of all time steps are assembled as Kronecker products of the identity over time steps and the
+        # constraint matrix of one time step
+        time_step_count = len(time_steps)
+        identity = sp.identity(time_step_count, format='csr')
+        building_count = len(problem.building_ids)
+        line_count = len(problem.line_ids)
+
+        # Variables ----------------------------------------------------------------------------------------------------
+        chillers_flow_var = problem.add_variable('chillers_flow_var', time_steps, lower_bound=0)
+        storage_flow_var = problem.add_variable('storage_flow_var', time_steps)
+        ets_flows_var = problem.add_variable('ets_flows_var', time_steps, problem.building_ids, lower_bound=0)
+        chillers_cooling_power = problem.add_variable(
+            'chillers_cooling_power',
+            time_steps,
+            lower_bound=0,
+            upper_bound=self.parameters.cooling_plant["chiller-set cooling capacity [W]"]
+        )
+        storage_energy_content = problem.add_variable(
+            'storage_energy_content',
+            time_steps,
+            lower_bound=TES_capacity_Wh,
+            upper_bound=0
+        )
+        total_flow_demand = problem.add_variable('total_flow_demand', time_steps, lower_bound=0)
+        lines_flow = problem.add_variable('lines_flow', time_steps, problem.line_ids, lower_bound=0)
+        lines_velocity = problem.add_variable(
+            'lines_velocity',
+            time_steps,
+            problem.line_ids,
+            lower_bound=max(0, self.parameters.distribution_system["minimum pipe velocity [m/s]"]),
+            upper_bound=self.parameters.distribution_system["maximum pipe velocity [m/s]"]
+        )
+        buildings_heat_inflow = problem.add_variable(
+            'buildings_heat_inflow',
+            time_steps,
+            problem.building_ids,
+            lower_bound=0
+        )
+        variable_state_timeseries = problem.add_variable(
+            'variable_state_timeseries',
+            time_steps,
+            stacked_buildings.states
+        )
+        variable_control_timeseries = problem.add_variable(
+            'variable_control_timeseries',
+            time_steps,
+            stacked_buildings.controls,
+            lower_bound=0
+        )
+        # Output bounds of buildings (CONSTRAINT 9.2) are given as variable bounds
+        variable_output_timeseries = problem.add_variable(
+            'variable_output_timeseries',
+            time_steps,
+            stacked_buildings.outputs,
+            lower_bound=np.nan_to_num(stacked_buildings.output_minimum, nan=-np.inf),
+            upper_bound=np.nan_to_num(stacked_buildings.output_maximum, nan=np.inf)
+        )
+        district_cooling_plant_total_power = problem.add_variable(
+            'district_cooling_plant_total_power',
+            time_steps,
+            lower_bound=0
+        )
+        distribution_system_total_power = problem.add_variable(
+            'distribution_system_total_power',
+            time_steps,
+            lower_bound=0
+        )
+        dcs_total_power = problem.add_variable('dcs_total_power', time_steps, lower_bound=0)
+        costs = problem.add_variable('costs', time_steps, lower_bound=0)
+
+        # Constraints --------------------------------------------------------------------------------------------------
+
+        # CONSTRAINT 1: Chiller-set's cooling power is linked with the variable of chiller-set's water flow
+        problem.add_constraints(
+            [
+                (chillers_cooling_power, identity),
+                (chillers_flow_var, -self.modelled_plant.get_chillers_evaporator_heat_flow(1.0) * identity)
+            ],
+            0
+        )
+
+        # CONSTRAINT 2, 3: Storage's flows are linked with its energy content, which complies with the initial and
+        # terminal charge ratio
+        problem.add_constraints(
+            [
+                (storage_energy_content, identity - sp.eye(time_step_count, k=-1, format='csr')),
+                (storage_flow_var, -self.modelled_plant.get_storage_energy_change_optimization_rule(1.0) * identity)
+            ],
+            np.concatenate([
+                [TES_capacity_Wh * self.parameters.cooling_plant["TES initial charge ratio [-]"]],
+                np.zeros(time_step_count - 1)
+            ])
+        )
+        problem.add_constraints(
+            [(storage_energy_content, identity[-1:])],
+            TES_capacity_Wh * self.parameters.cooling_plant["TES terminal charge ratio [-]"]
+        )
+
+        # CONSTRAINT 4: Total flow demand is set equal to the sum of chiller-set flow and Thermal Energy Storage flow
+        problem.add_constraints(
+            [(chillers_flow_var, identity), (storage_flow_var, identity), (total_flow_demand, -identity)],
+            0
+        )
+
+        # CONSTRAINT 5: Nodal flow balances, inflowing minus outflowing line flows equal the ETS flow at building
+        # nodes, zero at junction nodes and the negative total flow demand at reference nodes
+        node_count = len(compiled_grid.node_ids)
+        building_positions = np.flatnonzero(compiled_grid.node_type_codes[compiled_grid.building_node_positions] == 2)
+        node_building_matrix = sp.csr_matrix(
+            (
+                -np.ones(len(building_positions)),
+                (compiled_grid.building_node_positions[building_positions], building_positions)
+            ),
+            shape=(node_count, building_count)
+        )
+        reference_node_positions = np.flatnonzero(compiled_grid.node_type_codes == 0)
+        node_reference_matrix = sp.csr_matrix(
+            (
+                np.ones(len(reference_node_positions)),
+                (reference_node_positions, np.zeros(len(reference_node_positions), dtype=int))
+            ),
+            shape=(node_count, 1)
+        )
+        problem.add_constraints(
+            [
+                (lines_flow, sp.kron(identity, compiled_grid.incidence_matrix.transpose(), format='csr')),
+                (ets_flows_var, sp.kron(identity, node_building_matrix, format='csr')),
+                (total_flow_demand, sp.kron(identity, node_reference_matrix, format='csr'))
+            ],
+            0
+        )
+
+        # CONSTRAINT 6: Line's velocities are linked with line's flows
+        problem.add_constraints(
+            [
+                (lines_velocity, sp.identity(time_step_count * line_count, format='csr')),
+                (
+                    lines_flow,
+                    sp.kron(
+                        identity,
+                        sp.diags(-self.modelled_grid.get_pipe_velocity(1.0, compiled_grid.line_diameters)),
+                        format='csr'
+                    )
+                )
+            ],
+            0
+        )
+
+        # CONSTRAINT 7: Heat flow from building is linked to water flow to building
+        problem.add_constraints(
+            [
+                (buildings_heat_inflow, sp.identity(time_step_count * building_count, format='csr')),
+                (
+                    ets_flows_var,
+                    -self.modelled_grid.get_heat_intake_from_ets_flow(1.0)
+                    * sp.identity(time_step_count * building_count, format='csr')
+                )
+            ],
+            0
+        )
+
+        # CONSTRAINT 8.1, 8.2: Buildings' initial state and state equation
+        state_count = len(stacked_buildings.states)
+        problem.add_constraints(
+            [(variable_state_timeseries, sp.kron(identity[:1], sp.identity(state_count), format='csr'))],
+            stacked_buildings.state_initial
+        )
+        problem.add_constraints(
+            [
+                (
+                    variable_state_timeseries,
+                    sp.kron(identity[1:], sp.identity(state_count), format='csr')
+                    - sp.kron(identity[:-1], stacked_buildings.A, format='csr')
+                ),
+                (variable_control_timeseries, -sp.kron(identity[:-1], stacked_buildings.B, format='csr'))
+            ],
+            stacked_buildings.state_disturbance_contribution[:-1].ravel()
+        )
+
+        # CONSTRAINT 9.1: Buildings' output equation
+        output_count = len(stacked_buildings.outputs)
+        problem.add_constraints(
+            [
+                (variable_output_timeseries, sp.identity(time_step_count * output_count, format='csr')),
+                (variable_state_timeseries, -sp.kron(identity, stacked_buildings.C, format='csr')),
+                (variable_control_timeseries, -sp.kron(identity, stacked_buildings.E, format='csr'))
+            ],
+            stacked_buildings.output_disturbance_contribution.ravel()
+        )
+
+        # CONSTRAINT 10: Building heat flow from grid equals the building's cooling outputs
+        building_ids_modelled = list(self.modelled_buildings_dict.keys())
+        building_rows = {building_id: row for row, building_id in enumerate(building_ids_modelled)}
+        cooling_output_positions = np.array(
+            [
+                position
+                for position, (building_id, output) in enumerate(stacked_buildings.outputs)
+                if 'thermal_power_cooling' in output
+            ],
+            dtype=int
+        )
+        building_selection_matrix = sp.csr_matrix(
+            (
+                np.ones(len(building_ids_modelled)),
+                (np.arange(len(building_ids_modelled)), [problem.building_ids.index(b) for b in building_ids_modelled])
+            ),
+            shape=(len(building_ids_modelled), building_count)
+        )
+        building_output_matrix = sp.csr_matrix(
+            (
+                -np.ones(len(cooling_output_positions)),
+                (
+                    [building_rows[stacked_buildings.outputs[position][0]] for position in cooling_output_positions],
+                    cooling_output_positions
+                )
+            ),
+            shape=(len(building_ids_modelled), len(stacked_buildings.outputs))
+        )
+        problem.add_constraints(
+            [
+                (buildings_heat_inflow, sp.kron(identity, building_selection_matrix, format='csr')),
+                (variable_output_timeseries, sp.kron(identity, building_output_matrix, format='csr'))
+            ],
+            0
+        )
+
+        # CONSTRAINT 11: District cooling plant's total electric power consumption
+        plant_power_coefficients = self.modelled_plant.get_plant_power_coefficients().reindex(time_steps)
+        chillers_power_coefficients = plant_power_coefficients['Chiller-set power coefficient [W/(m3/s)]'].values
+        problem.add_constraints(
+            [
+                (district_cooling_plant_total_power, identity),
+                (chillers_flow_var, -sp.diags(chillers_power_coefficients)),
+                (
+                    storage_flow_var,
+                    -float(plant_power_coefficients['TES power coefficient [W/(m3/s)]'].iloc[0]) * identity
+                )
+            ],
+            0
+        )
+
+        # CONSTRAINT 12: Distribution system's total electric power consumption, by distributed (True) or central
+        # (False) secondary pumping
+        pumping_coefficient = (
+            (1 / self.parameters.distribution_system["pump efficiency secondary pump [-]"])
+            * self.parameters.physics["water density [kg/m^3]"]
+            * self.parameters.physics["gravitational acceleration [m^2/s]"]
+        )
+        head_differences = ds_head_differences_time_array[[str(time_step) for time_step in time_steps]]
+        if distributed_secondary_pumping:
+            head_differences = head_differences.loc[problem.building_ids].values.astype(float)
+            problem.add_constraints(
+                [
+                    (distribution_system_total_power, identity),
+                    (
+                        ets_flows_var,
+                        sp.csr_matrix(
+                            (
+                                -pumping_coefficient * head_differences.transpose().ravel(),
+                                np.arange(time_step_count * building_count),
+                                np.arange(time_step_count + 1) * building_count
+                            ),
+                            shape=(time_step_count, time_step_count * building_count)
+                        )
+                    )
+                ],
+                0
+            )
+        else:
+            problem.add_constraints(
+                [
+                    (distribution_system_total_power, identity),
+                    (total_flow_demand, sp.diags(-pumping_coefficient * head_differences.max().values.astype(float)))
+                ],
+                0
+            )
+
+        # CONSTRAINT 13: DCS's total electric power consumption in MW results from DS and DCP's power consumption
+        problem.add_constraints(
+            [
+                (dcs_total_power, identity),
+                (district_cooling_plant_total_power, -identity / (10 ** 6)),
+                (distribution_system_total_power, -identity / (10 ** 6))
+            ],
+            0
+        )
+
+        # CONSTRAINT 14: Costs result from energy price and DCS's power consumption
+        problem.add_constraints(
+            [
+                (costs, identity),
+                (
+                    dcs_total_power,
+                    -sp.diags(
+                        self.parameters.environment["Price [S$/MWh]"].values
+                        * self.parameters.physics["duration of one time step [h]"]
+                    )
+                )
+            ],
+            0
+        )
+
+        # Objective and solving ----------------------------------------------------------------------------------------
+        problem.add_cost(costs, 1)
+        problem.solve()
         return problem
 
     def get_solution_as_dataframe(
@@ -1,5 +1,10 @@
+import hashlib
+import json
+import numpy as np
 import os
 import pandas as pd
+import shutil
+import tempfile
 
 # ======================================================================================================================
 # Parameter reading CLASS
@@ -8,48 +13,310 @@ import pandas as pd
 
 class ParametersReader:
     """
-    Imports all parameters from file 'parameters' into a form the other classes understand
+    Imports all parameters from file 'parameters' into a form the other classes understand. Every parameter set is
+    only read on its first access, such that scripts using e.g. only the network do not read the environment. Parsed
+    files are cached in binary form in a cache directory (by default 'cache' within the data directory) and loaded
+    memory-mapped by later runs, as long as the file is unchanged.
     """
 
-    def __init__(self):
-
+    # Files and reading options of all parameter sets, squeeze denotes property-value tables read as Series
+    parameter_files = {
         # Parameters of distribution system
-        self.lines = pd.read_csv(
-            os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'lines.csv'),
-            index_col=0
-        )
-        self.nodes = pd.read_csv(
-            os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'nodes.csv'),
-            index_col=0
-        )
-        self.distribution_system = pd.read_csv(
-            os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'distribution_system.csv'),
-            index_col=0,
-            squeeze=True
-        )
-        # Parameters of buildings
-        # self.buildings = pd.read_csv(
-        #     os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'simple_buildings.csv'),
-        #     index_col=0
-        # )
-        self.buildings = pd.read_csv(
-            os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'buildings.csv'),
-            index_col=0
-        )
+        'lines': ('lines.csv', {'index_col': 0}, False),
+        'nodes': ('nodes.csv', {'index_col': 0}, False),
+        'distribution_system': ('distribution_system.csv', {'index_col': 0}, True),
+        # Parameters of buildings ('simple_buildings.csv' for simple buildings)
+        'buildings': ('buildings.csv', {'index_col': 0}, False),
         # Parameters of district cooling plant
-        self.cooling_plant = pd.read_csv(
-            os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'district_cooling_plant.csv'),
-            index_col=0,
-            squeeze=True
-        )
-        # Parameters of environment
-        self.environment = pd.read_csv(
-            os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'environment.csv'),
-            index_col=0
-        )
+        'cooling_plant': ('district_cooling_plant.csv', {'index_col': 0}, True),
+        # Parameters of environment, only the consumed columns are read
+        'environment': (
+            'environment.csv',
+            {
+                'index_col': 0,
+                'usecols': ['TimeStep', 'Air wet-bulb temperature [°C]', 'Price [S$/MWh]', 'DATE'],
+                'dtype': {
+                    'TimeStep': 'int64',
+                    'Air wet-bulb temperature [°C]': 'float64',
+                    'Price [S$/MWh]': 'float64',
+                    'DATE': 'str'
+                }
+            },
+            False
+        ),
         # Parameters of physical properties
-        self.physics = pd.read_csv(
-            os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'physical_properties.csv'),
-            index_col=0,
-            squeeze=True
-        )
\ No newline at end of file
+        'physics': ('physical_properties.csv', {'index_col': 0}, True)
+    }
+
+    def __init__(
+        self,
+        data_path=None,
+        cache_path=None,
+        **file_overrides
+    ):
+        """
+        :param data_path: directory of the parameter files, defaults to the directory 'data' of the repository.
+        :param cache_path: directory of the binary caches of parsed files, defaults to the directory 'cache' of the
+        data directory; False disables caching.
+        :param file_overrides: parameter sets replacing the defaults, by name of the parameter set as of
+        parameter_files, either as file name in the data directory or as DataFrame / Series, e.g.
+        environment='environment_day.csv'.
+        """
+        if data_path is None:
+            data_path = os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data')
+        self.data_path = data_path
+        if cache_path is None:
+            cache_path = os.path.join(self.data_path, 'cache')
+        self.cache_path = cache_path
+        self.file_names = {name: parameter_file[0] for name, parameter_file in self.parameter_files.items()}
+        self.parameters_loaded = {}
+
+        # Parameters-object of which all parameter sets which are not overridden are taken, as of derive
+        self.parent = None
+        self.overridden = set()
+        self.set_overrides(file_overrides)
+
+    # METHOD DEFINITIONS ===============================================================================================
+
+    def load_parameters(
+        self,
+        name
+    ):
+        """
+        :param name: name of the parameter set, as of parameter_files.
+        :return: the parameter set, read from its file on first access.
+        """
+        if name not in self.parameters_loaded:
+            if (self.parent is not None) and (name not in self.overridden):
+                # Shared with the parent, which loads it only once for all derived parameters-objects
+                self.parameters_loaded[name] = self.parent.load_parameters(name)
+                return self.parameters_loaded[name]
+            _, read_options, squeeze = self.parameter_files[name]
+            parameters = self.load_csv(self.file_names[name], **read_options)
+            if squeeze:
+                parameters = parameters.squeeze('columns')
+            self.parameters_loaded[name] = parameters
+        return self.parameters_loaded[name]
+
+    def set_overrides(
+        self,
+        overrides
+    ):
+        for name, override in overrides.items():
+            if name not in self.parameter_files:
+                raise ValueError("Unknown parameter set: " + str(name))
+            self.overridden.add(name)
+            if isinstance(override, (pd.DataFrame, pd.Series)):
+                self.parameters_loaded[name] = override
+            else:
+                self.file_names[name] = override
+                self.parameters_loaded.pop(name, None)
+
+    def derive(
+        self,
+        **overrides
+    ):
+        """
+        Creates a parameters-object of a scenario variant, e.g. parameters.derive(environment='environment_day.csv').
+        All parameter sets which are not overridden are shared with this parameters-object, i.e. neither read again
+        nor copied, hence they must not be modified in place.
+        :param overrides: parameter sets replacing those of this parameters-object, as of __init__.
+        :return: derived parameters-object.
+        """
+        derived = ParametersReader(self.data_path, self.cache_path)
+        derived.file_names = dict(self.file_names)
+        derived.parent = self
+        derived.set_overrides(overrides)
+        return derived
+
+    def get_time_window(
+        self,
+        start=None,
+        end=None,
+        start_date=None,
+        end_date=None
+    ):
+        """
+        Creates a parameters-object of a time window, whose environment is a slice of this environment, such that all
+        components built from it only model the time steps of the window. All other parameter sets are shared, as of
+        derive.
+        :param start: first time step of the window, defaults to the first time step.
+        :param end: last time step of the window, defaults to the last time step.
+        :param start_date: first date of the window, e.g. '8-Jan-18' or a datetime, by the environment's column 'DATE'.
+        :param end_date: last date of the window, inclusively.
+        :return: derived parameters-object.
+        """
+        environment = self.environment.loc[start:end]
+        if (start_date is not None) or (end_date is not None):
+            if 'DATE' not in environment.columns:
+                raise ValueError("Environment has no column 'DATE', time window can only be given by time steps")
+            dates = pd.to_datetime(environment['DATE'], format='%d-%b-%y')
+            in_window = np.ones(len(environment), dtype=bool)
+            if start_date is not None:
+                in_window &= (dates >= pd.to_datetime(start_date, format=self.get_date_format(start_date))).values
+            if end_date is not None:
+                in_window &= (dates <= pd.to_datetime(end_date, format=self.get_date_format(end_date))).values
+            environment = environment.loc[in_window]
+        if len(environment) == 0:
+            raise ValueError("Time window contains no time steps")
+        return self.derive(environment=environment)
+
+    @staticmethod
+    def get_date_format(
+        date
+    ):
+        # Dates given as strings are expected in the format of the environment's column 'DATE'
+        return '%d-%b-%y' if isinstance(date, str) else None
+
+    def load_csv(
+        self,
+        file_name,
+        **read_options
+    ):
+        """
+        Reads a CSV file of the data directory by pd.read_csv. If caching is enabled, the file is read by its binary
+        cache if it has been read before with the same reading options and is unchanged since, otherwise the cache is
+        created. Columns given in usecols which are missing in the file are ignored.
+        :param file_name: name of the file in the data directory.
+        :param read_options: keyword arguments of pd.read_csv.
+        :return: DataFrame, equal and just as writable whether loaded from the cache or not.
+        """
+        file_path = os.path.join(self.data_path, file_name)
+        if self.cache_path is not False:
+            # Caches are named by the file and reading options, followed by the file's version
+            file_status = os.stat(file_path)
+            cache_prefix = file_name + '-' + hashlib.sha1(
+                json.dumps([os.path.abspath(file_path), read_options], sort_keys=True, default=repr).encode()
+            ).hexdigest()[:16] + '-'
+            file_cache_path = os.path.join(
+                self.cache_path,
+                cache_prefix + str(file_status.st_size) + '-' + str(file_status.st_mtime_ns)
+            )
+            try:
+                return self.load_csv_cache(file_cache_path)
+            except (OSError, ValueError):
+                # Not cached yet, or removed meanwhile by another process
+                pass
+
+        if 'usecols' in read_options and not callable(read_options['usecols']):
+            usecols = list(read_options['usecols'])
+            read_options = dict(read_options, usecols=lambda column: column in usecols)
+        data = pd.read_csv(file_path, **read_options)
+        if self.cache_path is not False:
+            try:
+                self.save_csv_cache(data, cache_prefix, file_cache_path)
+            except OSError:
+                # Caching is only an acceleration, e.g. read-only cache directories are not written, and a cache
+                # created meanwhile by another process is not replaced
+                pass
+        return data
+
+    def save_csv_cache(
+        self,
+        data,
+        cache_prefix,
+        file_cache_path
+    ):
+        """
+        Saves a DataFrame as cache of a file, removing the caches of former versions of the file read with the same
+        options. Values are saved as one 2-D array 'values.npy' if all columns have the same numeric dtype, otherwise
+        numeric columns as one array per column and all other columns within 'labels.json', which also holds the index
+        and column labels.
+        """
+        labels = {
+            'index': data.index.tolist(),
+            'index_names': list(data.index.names),
+            'columns': data.columns.tolist(),
+            'column_dtypes': [str(dtype) for dtype in data.dtypes],
+            'non_numeric_columns': {}
+        }
+        os.makedirs(self.cache_path, exist_ok=True)
+        temporary_path = tempfile.mkdtemp(dir=self.cache_path)
+        try:
+            numeric = [pd.api.types.is_numeric_dtype(dtype) for dtype in data.dtypes]
+            if len(data.columns) > 0 and all(numeric) and len(set(data.dtypes)) == 1:
+                np.save(os.path.join(temporary_path, 'values.npy'), data.values)
+            else:
+                for position in range(len(data.columns)):
+                    if numeric[position]:
+                        column_path = os.path.join(temporary_path, 'column_' + str(position) + '.npy')
+                        np.save(column_path, data.iloc[:, position].values)
+                    else:
+                        labels['non_numeric_columns'][str(position)] = data.iloc[:, position].tolist()
+            with open(os.path.join(temporary_path, 'labels.json'), 'w') as file:
+                json.dump(labels, file)
+
+            # The new cache is moved into place as a whole, failing if another process has created it meanwhile
+            os.replace(temporary_path, file_cache_path)
+        finally:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+
+        # Caches of former versions are removed, temporary directories of other processes never match the prefix
+        for cache_name in os.listdir(self.cache_path):
+            cache_path = os.path.join(self.cache_path, cache_name)
+            if cache_name.startswith(cache_prefix) and (cache_path != file_cache_path):
+                shutil.rmtree(cache_path, ignore_errors=True)
+
+    @staticmethod
+    def load_csv_cache(
+        file_cache_path
+    ):
+        with open(os.path.join(file_cache_path, 'labels.json')) as file:
+            labels = json.load(file)
+        if len(labels['index_names']) > 1:
+            index = pd.MultiIndex.from_tuples(
+                [tuple(label) for label in labels['index']],
+                names=labels['index_names']
+            )
+        else:
+            index = pd.Index(labels['index'], name=labels['index_names'][0])
+        columns = pd.Index(labels['columns'])
+
+        values_path = os.path.join(file_cache_path, 'values.npy')
+        # Memory-mapped copy-on-write, i.e. the values are writable without ever modifying the cache, and viewed as
+        # plain arrays, such that the frames equal those read without cache
+        if os.path.isfile(values_path):
+            values = np.asarray(np.load(values_path, mmap_mode='c'))
+            return pd.DataFrame(values, index=index, columns=columns, copy=False)
+        data = {}
+        for position, dtype in enumerate(labels['column_dtypes']):
+            if str(position) in labels['non_numeric_columns']:
+                values = labels['non_numeric_columns'][str(position)]
+            else:
+                values = np.asarray(
+                    np.load(os.path.join(file_cache_path, 'column_' + str(position) + '.npy'), mmap_mode='c')
+                )
+            data[position] = pd.Series(values, index=index, dtype=dtype, copy=False)
+        data = pd.DataFrame(data, index=index, copy=False)
+        data.columns = columns
+        return data
+
+    # Parameter sets ---------------------------------------------------------------------------------------------------
+
+    @property
+    def lines(self):
+        return self.load_parameters('lines')
+
+    @property
+    def nodes(self):
+        return self.load_parameters('nodes')
+
+    @property
+    def distribution_system(self):
+        return self.load_parameters('distribution_system')
+
+    @property
+    def buildings(self):
+        return self.load_parameters('buildings')
+
+    @property
+    def cooling_plant(self):
+        return self.load_parameters('cooling_plant')
+
+    @property
+    def environment(self):
+        return self.load_parameters('environment')
+
+    @property
+    def physics(self):
+        return self.load_parameters('physics')
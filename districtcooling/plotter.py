@@ -3,14 +3,19 @@ import matplotlib.pyplot as plt
 import networkx as nx
 import os
 
+from districtcooling.compiledgrid import CompiledGrid
+
 # ======================================================================================================================
 # Tool-kit for visualization and plotting CLASS
 # ======================================================================================================================
 
 class Plotter:
 
-    def __init__(self, parameters):
+    def __init__(self, parameters, compiled_grid=None):
         self.parameters = parameters
+        if compiled_grid is None:
+            compiled_grid = CompiledGrid(parameters=parameters)
+        self.compiled_grid = compiled_grid
 
     def plot_grid_simulation(
         self,
@@ -26,18 +31,16 @@ class Plotter:
         graph = nx.DiGraph()
 
         # -------------------- Nodes
-        list_nodes = list(self.parameters.nodes.index)
+        list_nodes = self.compiled_grid.node_ids.tolist()
 
         pos_nodes = {
-            node: (
-                self.parameters.nodes['position-X'][node],
-                self.parameters.nodes['position-Y'][node]
-            ) for node in list_nodes
+            node: tuple(coordinates)
+            for node, coordinates in zip(list_nodes, self.compiled_grid.node_coordinates)
         }
 
         building_polygons = (
             geopandas.read_file(
-                os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'building_polygons.shp')
+                os.path.join(self.parameters.data_path, 'building_polygons.shp')
             )
         )
         building_polygons.plot(color='lightgrey')
@@ -52,11 +55,10 @@ class Plotter:
             alpha=1
         )
         # Add labels to nodes
+        nodal_heads = grid_simulation.loc["Total head at nodes [m]"][time_step].reindex(list_nodes).values
         labels_for_nodes = {
-            node_id: round(
-                grid_simulation.loc["Total head at nodes [m]"][time_step][node_id], 1
-            )
-            for node_id in list_nodes}
+            node_id: round(nodal_head, 1)
+            for node_id, nodal_head in zip(list_nodes, nodal_heads)}
 
         nx.draw_networkx_labels(
             graph,
@@ -65,19 +67,16 @@ class Plotter:
             font_size=10)
 
         # -------------------- Lines (=edges)
-        list_edges = [
-            (
-                self.parameters.lines.loc[index]['Start'],
-                self.parameters.lines.loc[index]['End']
-            )
-            for index in self.parameters.lines.index
-        ]
+        list_edges = list(zip(
+            self.compiled_grid.node_ids[self.compiled_grid.line_start_positions].tolist(),
+            self.compiled_grid.node_ids[self.compiled_grid.line_end_positions].tolist()
+        ))
+
+        line_ids = self.compiled_grid.line_ids.tolist()
+        line_flows = grid_simulation.loc["Flow in lines [qbm/s]"][time_step].reindex(line_ids).values
+        line_head_losses = grid_simulation.loc["Head loss over lines [m]"][time_step].reindex(line_ids).values
 
-        weight_lines = [
-            grid_simulation.loc["Flow in lines [qbm/s]"][time_step][index]
-            * 4.5
-            for index in self.parameters.lines.index
-        ]
+        weight_lines = line_flows * 4.5
 
         nx.draw_networkx_edges(
             graph,
@@ -98,24 +97,13 @@ class Plotter:
         )
         # Add labels to lines
         labels_for_lines = {
-            (self.parameters.lines.loc[index]['Start'], self.parameters.lines.loc[index]['End'])
-            : (
+            edge: (
                     "V="
-                    + str(
-                        round(
-                            grid_simulation.loc["Flow in lines [qbm/s]"][time_step][index],
-                            1
-                        )
-                    )
+                    + str(round(line_flow, 1))
                     + ", h="
-                    + str(
-                        round(
-                            grid_simulation.loc["Head loss over lines [m]"][time_step][index],
-                            1
-                        )
-                    )
+                    + str(round(line_head_loss, 1))
             )
-            for index in self.parameters.lines.index
+            for edge, line_flow, line_head_loss in zip(list_edges, line_flows, line_head_losses)
         }
 
         nx.draw_networkx_edge_labels(
@@ -151,18 +139,16 @@ class Plotter:
         graph = nx.DiGraph()
 
         # -------------------- Nodes
-        list_nodes = list(self.parameters.nodes.index)
+        list_nodes = self.compiled_grid.node_ids.tolist()
 
         pos_nodes = {
-            node: (
-                self.parameters.nodes['position-X'][node],
-                self.parameters.nodes['position-Y'][node]
-            ) for node in list_nodes
+            node: tuple(coordinates)
+            for node, coordinates in zip(list_nodes, self.compiled_grid.node_coordinates)
         }
 
         building_polygons = (
             geopandas.read_file(
-                os.path.join(os.path.dirname(os.path.normpath(__file__)), '..', 'data', 'building_polygons.shp')
+                os.path.join(self.parameters.data_path, 'building_polygons.shp')
             )
         )
         building_polygons.plot(color='grey')
@@ -188,13 +174,10 @@ class Plotter:
             font_size=8)
 
         # -------------------- Lines (=edges)
-        list_edges = [
-            (
-                self.parameters.lines.loc[index]['Start'],
-                self.parameters.lines.loc[index]['End']
-            )
-            for index in self.parameters.lines.index
-        ]
+        list_edges = list(zip(
+            self.compiled_grid.node_ids[self.compiled_grid.line_start_positions].tolist(),
+            self.compiled_grid.node_ids[self.compiled_grid.line_end_positions].tolist()
+        ))
 
         nx.draw_networkx_edges(
             graph,
@@ -0,0 +1,270 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+import pandas as pd
+import pyomo.environ as py
+
+from districtcooling.coolinggrid import CoolingGrid
+from districtcooling.coolingplant import CoolingPlant
+from districtcooling.optimizer import LinearOptimizer
+from districtcooling.parametersreader import ParametersReader
+
+
+def build_cobmo_scenario_objects():
+    """
+    Default builder of ScenarioSweep, building the parameters and the cobmo buildings as in main.py.
+    :return: parameters-object and dict of building IDs to cobmo buildings.
+    """
+    import cobmo.building
+    import cobmo.database_interface
+
+    parameters = ParametersReader()
+    buildings_dict = {
+        building_id: cobmo.building.Building(
+            conn=cobmo.database_interface.connect_database(),
+            scenario_name=building['building_scenario_name']
+        )
+        for building_id, building in parameters.buildings.iterrows()
+    }
+    return parameters, buildings_dict
+
+
+# Names of the thread count options of the supported solvers, as of ScenarioSweep's solver_threads
+solver_thread_options = {
+    'gurobi': 'Threads',
+    'gurobi_persistent': 'Threads',
+    'appsi_highs': 'threads',
+    'highs': 'threads',
+    'cbc': 'threads',
+    'cplex': 'threads'
+}
+
+# State of the current worker process, set once per process by initialize_sweep_worker
+sweep_worker_state = None
+
+
+def initialize_sweep_worker(
+    builder,
+    head_differences_file,
+    results_path,
+    solver_name,
+    solver_threads,
+    backend
+):
+    global sweep_worker_state
+    parameters, buildings_dict = builder()
+    sweep_worker_state = {
+        'parameters': parameters,
+        'buildings_dict': buildings_dict,
+        'head_differences': parameters.load_csv(head_differences_file, index_col=[0]),
+        'results_path': results_path,
+        'solver_name': solver_name,
+        'solver_threads': solver_threads,
+        'backend': backend,
+        'optimizers': {}
+    }
+
+
+def get_sweep_worker_optimizer(
+    environment
+):
+    """
+    :param environment: file name of the environment, None for the one of the builder's parameters.
+    :return: optimizer of the current worker process for the environment, built on first use and reused afterwards.
+    """
+    optimizers = sweep_worker_state['optimizers']
+    if environment not in optimizers:
+        parameters = sweep_worker_state['parameters']
+        if environment is not None:
+            parameters = parameters.derive(environment=environment)
+        optimizer = LinearOptimizer(
+            parameters=parameters,
+            coolinggrid=CoolingGrid(parameters=parameters),
+            coolingplant=CoolingPlant(parameters=parameters),
+            buildings_dict=sweep_worker_state['buildings_dict']
+        )
+        if sweep_worker_state['solver_name'] is not None:
+            optimizer.solver = py.SolverFactory(sweep_worker_state['solver_name'])
+        if sweep_worker_state['solver_threads'] is not None:
+            thread_option = solver_thread_options[sweep_worker_state['solver_name'] or 'gurobi']
+            optimizer.solver.options[thread_option] = sweep_worker_state['solver_threads']
+        optimizers[environment] = optimizer
+    return optimizers[environment]
+
+
+def solve_scenario(
+    scenario
+):
+    optimizer = get_sweep_worker_optimizer(scenario['environment'])
+    solved_optimization_problem = optimizer.build_and_solve_problem(
+        ds_head_differences_time_array=sweep_worker_state['head_differences'],
+        TES_capacity_Wh=scenario['TES_capacity_Wh'],
+        distributed_secondary_pumping=scenario['distributed_secondary_pumping'],
+        backend=sweep_worker_state['backend']
+    )
+    solution = optimizer.get_solution_as_dataframe(solved_optimization_problem)
+
+    # Written to a temporary file first, such that an interrupted sweep never leaves a partial solution behind
+    result_file_path = ScenarioSweep.get_result_file_path(sweep_worker_state['results_path'], scenario)
+    temporary_file_path = result_file_path + '.' + str(os.getpid()) + '.tmp'
+    try:
+        solution.to_csv(temporary_file_path)
+        os.replace(temporary_file_path, result_file_path)
+    finally:
+        if os.path.exists(temporary_file_path):
+            os.remove(temporary_file_path)
+    return scenario['name']
+
+
+# ======================================================================================================================
+# Parallel sweep over optimization scenarios CLASS
+# ======================================================================================================================
+
+
+class ScenarioSweep:
+    """
+    Solves a declarative list of optimization scenarios in a pool of processes. Each process builds the parameters and
+    buildings once, by a configurable builder, and reuses them (and one optimizer per environment) for all of its
+    scenarios. The solution of every scenario is saved as soon as it is solved, scenarios whose solution is already
+    saved with the same settings are skipped, such that an interrupted sweep can be restarted.
+    """
+
+    # INITIALIZATION ===================================================================================================
+
+    def __init__(
+        self,
+        scenarios,
+        builder=build_cobmo_scenario_objects,
+        head_differences_file='headdifferencesETS_rounded.csv',
+        results_path=None,
+        processes=None,
+        solver_name=None,
+        solver_threads=None,
+        backend='pyomo'
+    ):
+        """
+        :param scenarios: list of dicts, each with the keys 'name', 'TES_capacity_Wh' and optionally
+        'distributed_secondary_pumping' (default False) and 'environment' (file name of the environment, default
+        the one of the builder's parameters).
+        :param builder: picklable callable, returning a parameters-object and a dict of building IDs to buildings.
+        :param head_differences_file: file of the ETS head differences in the data directory.
+        :param results_path: directory of the scenarios' solutions, defaults to 'results/csv_files/scenario_sweep'.
+        :param processes: number of processes, defaults to the number of CPUs.
+        :param solver_name: name of the Pyomo solver, defaults to the one of LinearOptimizer (Gurobi).
+        :param solver_threads: number of threads of the solver in each process, defaults to the solver's default;
+        only for the solvers of solver_thread_options.
+        :param backend: backend of LinearOptimizer.build_and_solve_problem.
+        """
+        self.scenarios = [
+            {
+                'name': scenario['name'],
+                'TES_capacity_Wh': scenario['TES_capacity_Wh'],
+                'distributed_secondary_pumping': scenario.get('distributed_secondary_pumping', False),
+                'environment': scenario.get('environment', None)
+            }
+            for scenario in scenarios
+        ]
+        scenario_names = [scenario['name'] for scenario in self.scenarios]
+        if len(set(scenario_names)) != len(scenario_names):
+            raise ValueError("Scenario names must be unique")
+
+        if solver_threads is not None:
+            if backend != 'pyomo':
+                raise ValueError("Solver threads are only supported by the backend 'pyomo'")
+            if (solver_name or 'gurobi') not in solver_thread_options:
+                raise ValueError("Solver threads are not supported for solver: " + str(solver_name))
+
+        if results_path is None:
+            results_path = os.path.join(
+                os.path.dirname(os.path.normpath(__file__)), '..', 'results', 'csv_files', 'scenario_sweep'
+            )
+        if processes is None:
+            processes = os.cpu_count()
+        self.builder = builder
+        self.head_differences_file = head_differences_file
+        self.results_path = results_path
+        self.processes = processes
+        self.solver_name = solver_name
+        self.solver_threads = solver_threads
+        self.backend = backend
+
+        # Settings shared by all scenarios which determine their solutions, part of the solutions' file names
+        for scenario in self.scenarios:
+            scenario['settings'] = {
+                'head_differences_file': head_differences_file,
+                'solver_name': solver_name,
+                'backend': backend
+            }
+
+    # METHOD DEFINITIONS ===============================================================================================
+
+    @staticmethod
+    def get_result_file_path(
+        results_path,
+        scenario
+    ):
+        """
+        :return: path of the scenario's solution, whose name contains a hash of all of the scenario's settings, such
+        that solutions saved with other settings are not taken for the scenario's.
+        """
+        scenario_hash = hashlib.sha1(json.dumps(scenario, sort_keys=True, default=repr).encode()).hexdigest()[:12]
+        return os.path.join(results_path, str(scenario['name']) + '-' + scenario_hash + '_scenario_solution.csv')
+
+    def get_pending_scenarios(
+        self
+    ):
+        """
+        :return: scenarios whose solution is not saved yet.
+        """
+        return [
+            scenario
+            for scenario in self.scenarios
+            if not os.path.isfile(self.get_result_file_path(self.results_path, scenario))
+        ]
+
+    def run(
+        self
+    ):
+        """
+        Solves all pending scenarios in parallel.
+        :return: solutions of all scenarios, as of LinearOptimizer.get_solution_as_dataframe, concatenated with the
+        scenario names as outermost index level.
+        """
+        pending_scenarios = self.get_pending_scenarios()
+        if pending_scenarios:
+            os.makedirs(self.results_path, exist_ok=True)
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(self.processes, len(pending_scenarios)),
+                initializer=initialize_sweep_worker,
+                initargs=(
+                    self.builder,
+                    self.head_differences_file,
+                    self.results_path,
+                    self.solver_name,
+                    self.solver_threads,
+                    self.backend
+                )
+            ) as executor:
+                list(executor.map(solve_scenario, pending_scenarios))
+        return self.get_results()
+
+    def get_results(
+        self
+    ):
+        """
+        :return: saved solutions of all scenarios, concatenated with the scenario names as outermost index level.
+        """
+        solutions = []
+        for scenario in self.scenarios:
+            solution = pd.read_csv(
+                self.get_result_file_path(self.results_path, scenario),
+                index_col=[0, 1]
+            )
+            solution.columns = solution.columns.astype(int)
+            solutions.append(solution)
+        return pd.concat(
+            solutions,
+            keys=[scenario['name'] for scenario in self.scenarios],
+            names=['SCENARIOS']
+        )
@@ -1,3 +1,7 @@
+import collections.abc
+import numpy as np
+import pandas as pd
+
 
 # ======================================================================================================================
 # Preliminary simple cubic building model CLASS
@@ -9,6 +13,19 @@ class CubicBuilding:
     INFO: Class representing a simple model of a cubic building.
     """
 
+    # Physical Values
+    density_air = 1.19                              # [kg/m^3]
+    specific_heat_capacity_air = 1005               # [J/kg*K]
+    density_concrete = 2100                         # [kg/m^3]
+    specific_heat_capacity_concrete = 880           # [J/kg*K]
+
+    # Volumetric shares of materials
+    volumetric_share_air = 0.95
+    volumetric_share_concrete = 0.05
+
+    # Estimated overall heat transfer coefficient on outside surface
+    overall_heat_transfer = 5                       # [W/m^2*K]
+
     # INITIALIZATION ===================================================================================================
 
     def __init__(
@@ -16,23 +33,10 @@ class CubicBuilding:
         building_id,
         parameters
     ):
-        # Physical Values
-        self.density_air = 1.19                         # [kg/m^3]
-        self.specific_heat_capacity_air = 1005                   # [J/kg*K]
-        self.density_concrete = 2100                    # [kg/m^3]
-        self.specific_heat_capacity_concrete = 880               # [J/kg*K]
-
-        # Volumetric shares of materials
-        self.volumetric_share_air = 0.95
-        self.volumetric_share_concrete = 0.05
-
-        # Estimated overall heat transfer coefficient on outside surface
-        self.overall_heat_transfer = 5                  # [W/m^2*K]
-
         # Values utilized from parameters-object
         self.parameters = parameters
         self.length_edge = parameters.buildings["Size [m]"][building_id]
-        self.duration_of_one_time_step = parameters.physics["duration of one time step [s]"]
+        self.duration_of_one_time_step = parameters.physics["duration of one time step [h]"] * 3600    # [s]
         self.initial_temperature = parameters.buildings["Initial Temperature [Celsius]"][building_id]
 
         # Calculating dimensions of the cube
@@ -51,6 +55,10 @@ class CubicBuilding:
             * self.density_concrete
         )
 
+        # Constant heat loss flow through the building's surface and temperature change per time step and heat flow
+        self.heat_loss_flow = self.overall_heat_transfer * self.surface * (28-21)      # [W]
+        self.temperature_change_factor = self.duration_of_one_time_step / self.heat_capacity_building   # [K/W]
+
     # METHOD DEFINITIONS ===============================================================================================
     """ Methods to calculate a resulting temperature from a given cooling power and a given time step taking into
     account constant heat loss flow and heat capacity of building """
@@ -64,16 +72,11 @@ class CubicBuilding:
         buildings_temperature_change = 0
         for time in self.parameters.environment.index:
             buildings_temperature_change += (
-                self.duration_of_one_time_step
+                self.temperature_change_factor
                 * (
-                    (
-                        self.overall_heat_transfer
-                        * self.surface
-                        * (28-21)
-                    )
+                    self.heat_loss_flow
                     - building_heat_flow_set[time, building_id]
                 )
-                / self.heat_capacity_building
             )
             if time == time_step:
                 break
@@ -93,4 +96,207 @@ class CubicBuilding:
                 building_heat_flow_set
             )
         )
-        return building_temperature
\ No newline at end of file
+        return building_temperature
+
+    def get_building_temperature_time_series(
+        self,
+        building_heat_flow_time_series
+    ):
+        """
+        Calculates the temperatures of this building at all time steps at once, as of get_building_temperature. For
+        many buildings at once, see CubicBuildingFleet.get_building_temperature_time_array.
+        :param building_heat_flow_time_series: heat flows taken from this building over time in [W], as 1-D array or
+        Series.
+        :return: building temperatures in [Celsius], of same type and shape as the heat flows.
+        """
+        if not isinstance(building_heat_flow_time_series, pd.Series):
+            building_heat_flow_time_series = np.asarray(building_heat_flow_time_series, dtype=float)
+            if building_heat_flow_time_series.ndim != 1:
+                raise ValueError(
+                    "Heat flows must be a time series of this building only, use CubicBuildingFleet for many buildings"
+                )
+        building_temperature = (
+            self.initial_temperature
+            + (
+                self.temperature_change_factor
+                * (
+                    self.heat_loss_flow
+                    - building_heat_flow_time_series
+                )
+            ).cumsum(axis=0)
+        )
+        return building_temperature
+
+
+# ======================================================================================================================
+# Fleet of simple cubic building models CLASS
+# ======================================================================================================================
+
+
+class CubicBuildingFleet(collections.abc.Mapping):
+    """
+    INFO: Class representing simple models of many cubic buildings (as of CubicBuilding) at once, with all building
+    properties held in parallel arrays. Behaves as dict of building IDs to state-space building models, which provide
+    the interface of cobmo buildings, such that a fleet can be passed to LinearOptimizer as buildings_dict.
+    """
+
+    # INITIALIZATION ===================================================================================================
+
+    def __init__(
+        self,
+        parameters,
+        buildings=None
+    ):
+        """
+        :param parameters: parameters-object.
+        :param buildings: DataFrame of the buildings as of 'simple_buildings.csv', defaults to 'simple_buildings.csv'
+        of the data directory.
+        """
+        if buildings is None:
+            buildings = parameters.load_csv('simple_buildings.csv', index_col=0)
+
+        # Values utilized from parameters-object
+        self.parameters = parameters
+        self.building_ids = np.array(buildings.index)
+        self.length_edges = buildings["Size [m]"].values.astype(float)
+        self.minimum_temperatures = buildings["Temperature MIN [Celsius]"].values.astype(float)
+        self.maximum_temperatures = buildings["Temperature MAX [Celsius]"].values.astype(float)
+        self.initial_temperatures = buildings["Initial Temperature [Celsius]"].values.astype(float)
+        self.duration_of_one_time_step = parameters.physics["duration of one time step [h]"] * 3600    # [s]
+
+        # Calculating dimensions of the cubes
+        self.surfaces = (self.length_edges ** 2) * 6    # [m]
+        self.volumes = self.length_edges ** 3           # [m]
+
+        # Calculating heat capacities of whole buildings
+        self.heat_capacities = (
+            CubicBuilding.specific_heat_capacity_air
+            * CubicBuilding.volumetric_share_air
+            * self.volumes
+            * CubicBuilding.density_air
+            + CubicBuilding.specific_heat_capacity_concrete
+            * CubicBuilding.volumetric_share_concrete
+            * self.volumes
+            * CubicBuilding.density_concrete
+        )
+
+        # Constant heat loss flows through the buildings' surfaces and temperature changes per time step and heat flow
+        self.heat_loss_flows = CubicBuilding.overall_heat_transfer * self.surfaces * (28-21)     # [W]
+        self.temperature_change_factors = self.duration_of_one_time_step / self.heat_capacities    # [K/W]
+
+        # State-space models are only formed on demand
+        self.building_positions = {building_id: position for position, building_id in enumerate(self.building_ids)}
+        self.building_models = {}
+
+    # Mapping of building IDs to state-space building models ==========================================================
+
+    def __getitem__(self, building_id):
+        if building_id not in self.building_models:
+            self.building_models[building_id] = CubicBuildingModel(
+                fleet=self,
+                position=self.building_positions[building_id]
+            )
+        return self.building_models[building_id]
+
+    def __iter__(self):
+        return iter(self.building_ids.tolist())
+
+    def __len__(self):
+        return len(self.building_ids)
+
+    # METHOD DEFINITIONS ===============================================================================================
+
+    def get_building_temperature_time_array(
+        self,
+        building_heat_flow_time_array
+    ):
+        """
+        Calculates the temperatures of all buildings at all time steps at once, as of
+        CubicBuilding.get_building_temperature.
+        :param building_heat_flow_time_array: heat flows taken from the buildings in [W], as array (time steps x
+        buildings) or DataFrame with the building IDs as columns.
+        :return: building temperatures in [Celsius], as DataFrame (time steps x buildings) if a DataFrame was given,
+        otherwise as array.
+        """
+        if isinstance(building_heat_flow_time_array, pd.DataFrame):
+            positions = [self.building_positions[building_id] for building_id in building_heat_flow_time_array.columns]
+        else:
+            positions = slice(None)
+        building_temperatures = (
+            self.initial_temperatures[positions]
+            + np.cumsum(
+                self.temperature_change_factors[positions]
+                * (
+                    self.heat_loss_flows[positions]
+                    - np.asarray(building_heat_flow_time_array, dtype=float)
+                ),
+                axis=0
+            )
+        )
+        if isinstance(building_heat_flow_time_array, pd.DataFrame):
+            building_temperatures = pd.DataFrame(
+                data=building_temperatures,
+                index=building_heat_flow_time_array.index,
+                columns=building_heat_flow_time_array.columns
+            )
+        return building_temperatures
+
+
+class CubicBuildingModel:
+    """
+    INFO: State-space model of one building of a CubicBuildingFleet, providing the attributes of a cobmo building.
+    The building temperature is the only state, changing per time step by the constant heat loss flow (a
+    disturbance) minus the cooling heat flow (the only control). Both the temperature, bounded by the building's
+    minimum and maximum temperature, and the cooling heat flow are outputs. As in cobmo, the state of a time step is
+    the temperature at its beginning.
+    """
+
+    def __init__(
+        self,
+        fleet,
+        position
+    ):
+        # Time steps are those of the environment, i.e. only those of its time window
+        time_steps = pd.RangeIndex(fleet.parameters.environment.index[0], fleet.parameters.environment.index[-1] + 1)
+        temperature_change_factor = fleet.temperature_change_factors[position]
+
+        self.set_timesteps = time_steps
+        self.set_states = pd.Index(['temperature'])
+        self.set_controls = pd.Index(['thermal_power_cooling'])
+        self.set_disturbances = pd.Index(['heat_loss_flow'])
+        self.set_outputs = pd.Index(['temperature', 'thermal_power_cooling'])
+        self.set_state_initial = pd.Series(
+            [fleet.initial_temperatures[position]],
+            index=self.set_states
+        )
+
+        self.state_matrix = pd.DataFrame(1.0, index=self.set_states, columns=self.set_states)
+        self.control_matrix = pd.DataFrame(-temperature_change_factor, index=self.set_states, columns=self.set_controls)
+        self.disturbance_matrix = pd.DataFrame(
+            temperature_change_factor,
+            index=self.set_states,
+            columns=self.set_disturbances
+        )
+        self.state_output_matrix = pd.DataFrame([[1.0], [0.0]], index=self.set_outputs, columns=self.set_states)
+        self.control_output_matrix = pd.DataFrame([[0.0], [1.0]], index=self.set_outputs, columns=self.set_controls)
+        self.disturbance_output_matrix = pd.DataFrame(0.0, index=self.set_outputs, columns=self.set_disturbances)
+
+        self.disturbance_timeseries = pd.DataFrame(
+            fleet.heat_loss_flows[position],
+            index=time_steps,
+            columns=self.set_disturbances
+        )
+        self.output_constraint_timeseries_minimum = pd.DataFrame(
+            {
+                'temperature': fleet.minimum_temperatures[position],
+                'thermal_power_cooling': 0.0
+            },
+            index=time_steps
+        )
+        self.output_constraint_timeseries_maximum = pd.DataFrame(
+            {
+                'temperature': fleet.maximum_temperatures[position],
+                'thermal_power_cooling': np.inf
+            },
+            index=time_steps
+        )
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# ======================================================================================================================
+# Conversion of building models into sparse matrices FUNCTION
+# ======================================================================================================================
+
+
+def get_building_matrices(
+    building,
+    time_steps
+):
+    """
+    Converts the state-space matrices and timeseries of a cobmo building (or any building providing the same
+    attributes, e.g. of a CubicBuildingFleet) into sparse matrices and arrays, ordered as the building's sets.
+    :param building: cobmo building.
+    :param time_steps: time steps of the environment. If the building's time steps are numbered as well (e.g. of a
+    CubicBuildingFleet), they are found by their number, otherwise (cobmo buildings, whose time steps are the datetimes
+    of the whole year) time step t refers to building.set_timesteps[t - 1].
+    :return: dict of the sparse (CSR) matrices 'A' (state), 'B' (control), 'D' (disturbance), 'C' (state output),
+    'E' (control output), 'F' (disturbance output), and the arrays 'state_initial' (states), 'disturbances' (time
+    steps x disturbances), 'output_minimum' and 'output_maximum' (time steps x outputs).
+    """
+    states = building.set_states
+    controls = building.set_controls
+    disturbances = building.set_disturbances
+    outputs = building.set_outputs
+    if pd.api.types.is_integer_dtype(building.set_timesteps):
+        building_time_steps = pd.Index(time_steps)
+        missing_time_steps = building_time_steps.difference(building.set_timesteps)
+        if len(missing_time_steps) > 0:
+            raise ValueError("Building is not modelled for time steps: " + str(missing_time_steps.tolist()))
+    else:
+        building_time_steps = building.set_timesteps[np.asarray(time_steps) - 1]
+    building_matrices = {
+        'A': sp.csr_matrix(building.state_matrix.reindex(index=states, columns=states).values),
+        'B': sp.csr_matrix(building.control_matrix.reindex(index=states, columns=controls).values),
+        'D': sp.csr_matrix(building.disturbance_matrix.reindex(index=states, columns=disturbances).values),
+        'C': sp.csr_matrix(building.state_output_matrix.reindex(index=outputs, columns=states).values),
+        'E': sp.csr_matrix(building.control_output_matrix.reindex(index=outputs, columns=controls).values),
+        'F': sp.csr_matrix(building.disturbance_output_matrix.reindex(index=outputs, columns=disturbances).values),
+        'state_initial': np.asarray(pd.Series(building.set_state_initial).reindex(states).values, dtype=float),
+        'disturbances': (
+            building.disturbance_timeseries.reindex(index=building_time_steps, columns=disturbances).values
+        ),
+        'output_minimum': (
+            building.output_constraint_timeseries_minimum.reindex(index=building_time_steps, columns=outputs).values
+        ),
+        'output_maximum': (
+            building.output_constraint_timeseries_maximum.reindex(index=building_time_steps, columns=outputs).values
+        )
+    }
+    for matrix in ['A', 'B', 'D', 'C', 'E', 'F']:
+        building_matrices[matrix].eliminate_zeros()
+    return building_matrices
+
+
+# ======================================================================================================================
+# Block-stacked state-space model of all buildings CLASS
+# ======================================================================================================================
+
+
+class StackedBuildings:
+    """
+    Stacks the state-space models of all buildings into block-diagonal sparse matrices, which allows simulating the
+    states and outputs of the whole district for a given control trajectory without solving an optimization problem:
+        x(t+1) = A x(t) + B u(t) + D d(t)
+        y(t) = C x(t) + E u(t) + F d(t)
+    """
+
+    # INITIALIZATION ===================================================================================================
+
+    def __init__(
+        self,
+        parameters,
+        buildings_dict
+    ):
+        self.parameters = parameters
+        time_steps = self.parameters.environment.index
+
+        building_matrices_dict = {
+            building_id: get_building_matrices(building, time_steps)
+            for building_id, building in buildings_dict.items()
+        }
+
+        # Labels of stacked vectors, as tuples of building ID and state / control / output
+        self.states = pd.MultiIndex.from_tuples(
+            [(building_id, state) for building_id, building in buildings_dict.items() for state in building.set_states]
+        )
+        self.controls = pd.MultiIndex.from_tuples(
+            [
+                (building_id, control)
+                for building_id, building in buildings_dict.items() for control in building.set_controls
+            ]
+        )
+        self.outputs = pd.MultiIndex.from_tuples(
+            [
+                (building_id, output)
+                for building_id, building in buildings_dict.items() for output in building.set_outputs
+            ]
+        )
+
+        # Block-diagonal state-space matrices
+        for matrix in ['A', 'B', 'D', 'C', 'E', 'F']:
+            setattr(
+                self,
+                matrix,
+                sp.block_diag(
+                    [building_matrices[matrix] for building_matrices in building_matrices_dict.values()],
+                    format='csr'
+                )
+            )
+        self.state_initial = np.concatenate(
+            [building_matrices['state_initial'] for building_matrices in building_matrices_dict.values()]
+        )
+
+        # Disturbance contributions of all time steps (time steps x states / outputs) by a single matrix product each
+        disturbances = np.hstack(
+            [building_matrices['disturbances'] for building_matrices in building_matrices_dict.values()]
+        )
+        self.state_disturbance_contribution = (self.D @ disturbances.transpose()).transpose()
+        self.output_disturbance_contribution = (self.F @ disturbances.transpose()).transpose()
+
+        # Output bounds of all time steps (time steps x outputs)
+        self.output_minimum = np.hstack(
+            [building_matrices['output_minimum'] for building_matrices in building_matrices_dict.values()]
+        )
+        self.output_maximum = np.hstack(
+            [building_matrices['output_maximum'] for building_matrices in building_matrices_dict.values()]
+        )
+
+    # METHOD DEFINITIONS ===============================================================================================
+
+    def simulate(
+        self,
+        control_timeseries
+    ):
+        """
+        :param control_timeseries: controls of all buildings over time, as DataFrame (time steps x (building ID,
+        control)), where missing controls are zero, or array (time steps x stacked controls).
+        :return: states and outputs of all buildings over time, as DataFrames (time steps x (building ID, state /
+        output)).
+        """
+        if isinstance(control_timeseries, pd.DataFrame):
+            unknown_controls = control_timeseries.columns.difference(self.controls)
+            if len(unknown_controls) > 0:
+                raise ValueError("Unknown controls: " + str(unknown_controls.tolist()))
+            controls = control_timeseries.reindex(columns=self.controls, fill_value=0.0).values.astype(float)
+        else:
+            controls = np.asarray(control_timeseries, dtype=float)
+        time_step_count = controls.shape[0]
+
+        states = np.zeros((time_step_count, len(self.states)))
+        states[0] = self.state_initial
+        for time_index in range(time_step_count - 1):
+            states[time_index + 1] = (
+                self.A @ states[time_index]
+                + self.B @ controls[time_index]
+                + self.state_disturbance_contribution[time_index]
+            )
+        outputs = (
+            (self.C @ states.transpose()).transpose()
+            + (self.E @ controls.transpose()).transpose()
+            + self.output_disturbance_contribution[:time_step_count]
+        )
+
+        time_steps = self.parameters.environment.index[:time_step_count]
+        state_timeseries = pd.DataFrame(data=states, index=time_steps, columns=self.states)
+        output_timeseries = pd.DataFrame(data=outputs, index=time_steps, columns=self.outputs)
+        return state_timeseries, output_timeseries
+
+    def get_ets_flow_time_array(
+        self,
+        output_timeseries
+    ):
+        """
+        :param output_timeseries: outputs of all buildings over time, as of simulate.
+        :return: ETS flows of all buildings (rows) over time (columns) resulting from their cooling heat flows (all
+        outputs containing 'thermal_power_cooling'), suitable for CoolingGrid.get_grid_simulation.
+        """
+        cooling_outputs = output_timeseries.loc[
+            :,
+            ['thermal_power_cooling' in output for output in output_timeseries.columns.get_level_values(1)]
+        ]
+        buildings_heat_flow = cooling_outputs.T.groupby(level=0).sum().reindex(self.parameters.buildings.index)
+        ets_flow_time_array = (
+            buildings_heat_flow.fillna(0.0)
+            / (
+                self.parameters.physics["water density [kg/m^3]"]
+                * self.parameters.physics["specific enthalpy difference DW [J/kg]"]
+            )
+        )
+        return ets_flow_time_array
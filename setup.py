@@ -13,6 +13,7 @@ setuptools.setup(
         'numpy',
         'pandas',
         'pyomo',
+        'scipy',
         'shapely',
         'utm'
     ])
\ No newline at end of file
@@ -1,7 +1,6 @@
 import districtcooling as dc
 import cobmo.building
 import cobmo.database_interface
-import pandas as pd
 
 # Generate objects =====================================================================================================
 
@@ -25,8 +24,8 @@ optimizer = dc.LinearOptimizer(
     buildings_dict=buildings_dict
 )
 
-head_differences_ds = pd.read_csv(
-    'data/headdifferencesETS_rounded.csv',
+head_differences_ds = parameters.load_csv(
+    'headdifferencesETS_rounded.csv',
     index_col=[0]
 )
 print(head_differences_ds)
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.normpath(__file__)), '..'))
+
+import districtcooling as dc  # noqa: E402
+
+
+@pytest.fixture
+def parameters():
+    """Parameters of the repository's data with the one-day environment."""
+    return dc.ParametersReader(environment='environment_day.csv')
@@ -0,0 +1,21 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import districtcooling as dc
+
+
+def test_compiled_grid_is_immutable_also_after_pickling(parameters):
+    compiled_grid = dc.CompiledGrid(parameters)
+    for grid in [compiled_grid, pickle.loads(pickle.dumps(compiled_grid))]:
+        with pytest.raises(AttributeError):
+            grid.line_diameters = np.ones(len(grid.line_ids))
+        with pytest.raises(ValueError):
+            grid.line_diameters[0] = 1.0
+        with pytest.raises(TypeError):
+            grid.node_positions[grid.node_ids[0]] = 0
+        for array in [grid.incidence_matrix.data, grid.incidence_matrix.indices, grid.incidence_matrix.indptr]:
+            with pytest.raises(ValueError):
+                array[0] = 0
+    assert dict(pickle.loads(pickle.dumps(compiled_grid)).line_positions) == dict(compiled_grid.line_positions)
@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import districtcooling as dc
+
+
+def test_line_head_losses_equal_pipe_head_losses(parameters):
+    grid = dc.CoolingGrid(parameters)
+    lines = parameters.lines
+    line_flows = np.linspace(0.01, 2.0, len(lines))
+    line_head_losses, out_of_range = grid.get_line_head_loss_array(
+        line_flows,
+        [grid.compiled_grid.line_positions[line_id] for line_id in lines.index]
+    )
+    assert not out_of_range.any()
+    for line_flow, line_head_loss, (_, line) in zip(line_flows, line_head_losses, lines.iterrows()):
+        assert line_head_loss == pytest.approx(
+            grid.get_pipe_head_loss(
+                line_flow,
+                line['Diameter [m]'],
+                line['Absolute Roughness [mm]'],
+                line['Length [m]']
+            )
+        )
+
+
+def test_grid_pumping_skips_heads_outside_of_scope(parameters):
+    grid = dc.CoolingGrid(parameters)
+    ets_flow_time_array = grid.build_ets_flow_time_array(np.full(len(parameters.buildings), 0.05))
+    tree_equilibrium_time_array = grid.get_tree_equilibrium_time_array(ets_flow_time_array)
+    first_building_id = parameters.buildings.index[0]
+    tree_equilibrium_time_array.loc[('Total head at nodes [m]', first_building_id)] = np.nan
+
+    grid_pumping = grid.get_grid_pumping(tree_equilibrium_time_array)
+    ets_head_differences = grid_pumping.loc['Head difference over ETSs [m]']
+    central_flows = tree_equilibrium_time_array.loc['Ref. node consumption [qbm/s]'].iloc[0]
+    assert grid_pumping.loc['CSP power [W]'].iloc[0].values == pytest.approx(
+        (grid.pumping_power_coefficient * ets_head_differences.max() * central_flows.abs()).values
+    )
+    assert grid_pumping.loc['Overall DSP power [W]'].iloc[0].values == pytest.approx(
+        grid_pumping.loc['DSP power at ETSs [W]'].sum().values
+    )
+
+
+@pytest.mark.parametrize('hydraulic_solver', ['newton', 'dense'])
+def test_hydraulic_solvers_equal_tree_solver_on_radial_grid(parameters, hydraulic_solver):
+    ets_flow_time_array = dc.CoolingGrid(parameters).build_ets_flow_time_array(
+        np.linspace(0.01, 0.1, len(parameters.buildings))
+    )
+    tree_simulation = dc.CoolingGrid(parameters, hydraulic_solver='tree').get_grid_simulation(ets_flow_time_array)
+    simulation = dc.CoolingGrid(parameters, hydraulic_solver=hydraulic_solver).get_grid_simulation(ets_flow_time_array)
+    assert dc.CompiledGrid(parameters).is_tree
+    assert simulation.index.equals(tree_simulation.index)
+    assert simulation.values == pytest.approx(tree_simulation.values, rel=1e-6, abs=1e-6)
+
+
+def test_newton_solver_splits_flow_equally_over_parallel_lines(parameters):
+    lines = parameters.lines
+    parallel_line = lines.iloc[[0]].copy()
+    parallel_line.index = [lines.index.max() + 1]
+    looped_parameters = parameters.derive(lines=pd.concat([lines, parallel_line]))
+    grid = dc.CoolingGrid(looped_parameters)
+    assert grid.hydraulic_solver == 'newton'
+
+    ets_flow_time_array = grid.build_ets_flow_time_array(np.linspace(0.01, 0.1, len(parameters.buildings)))
+    line_flows = grid.get_grid_simulation(ets_flow_time_array).loc['Flow in lines [qbm/s]']
+    tree_line_flows = dc.CoolingGrid(parameters).get_grid_simulation(ets_flow_time_array).loc['Flow in lines [qbm/s]']
+    assert line_flows.loc[lines.index[0]].values == pytest.approx(line_flows.loc[parallel_line.index[0]].values)
+    assert 2 * line_flows.loc[lines.index[0]].values == pytest.approx(tree_line_flows.loc[lines.index[0]].values)
+    assert line_flows.loc[lines.index[1:]].values == pytest.approx(tree_line_flows.loc[lines.index[1:]].values)
+
+
+@pytest.fixture
+def ets_flow_time_array(parameters):
+    # Distinct flows at every time step, with the first time steps repeated at the end
+    grid = dc.CoolingGrid(parameters)
+    time_step_count = len(parameters.environment)
+    ets_flow_time_array = grid.build_ets_flow_time_array(np.full(len(parameters.buildings), 0.05))
+    ets_flow_time_array.iloc[:, :] = np.outer(
+        np.linspace(0.01, 0.1, len(parameters.buildings)),
+        np.concatenate([np.linspace(0.5, 1.5, time_step_count - 5), np.linspace(0.5, 1.5, time_step_count - 5)[:5]])
+    )
+    return ets_flow_time_array
+
+
+@pytest.mark.parametrize('chunk_size', [None, 7])
+def test_parallel_grid_simulation_equals_grid_simulation(parameters, ets_flow_time_array, chunk_size):
+    grid = dc.CoolingGrid(parameters)
+    pd.testing.assert_frame_equal(
+        grid.get_grid_simulation_parallel(ets_flow_time_array, processes=2, chunk_size=chunk_size),
+        grid.get_grid_simulation(ets_flow_time_array)
+    )
+
+
+def test_parallel_grid_simulation_of_no_time_steps(parameters, ets_flow_time_array):
+    grid = dc.CoolingGrid(parameters)
+    pd.testing.assert_frame_equal(
+        grid.get_grid_simulation_parallel(ets_flow_time_array.iloc[:, :0], processes=2),
+        grid.get_grid_simulation(ets_flow_time_array.iloc[:, :0])
+    )
+
+
+@pytest.mark.parametrize('flipped_lines', [False, True])
+def test_updated_grid_simulation_equals_grid_simulation(parameters, ets_flow_time_array, flipped_lines):
+    if flipped_lines:
+        lines = parameters.lines.copy()
+        lines.loc[lines.index[::3], ['Start', 'End']] = lines.loc[lines.index[::3], ['End', 'Start']].values
+        parameters = parameters.derive(lines=lines)
+    grid = dc.CoolingGrid(parameters)
+    grid_simulation = grid.get_grid_simulation(ets_flow_time_array)
+
+    building_ids = parameters.buildings.index
+    time_steps = ets_flow_time_array.columns
+    changed_ets_flows = {
+        (building_ids[0], time_steps[0]): 0.2,
+        (building_ids[-1], time_steps[0]): 0.0,
+        (building_ids[3], time_steps[10]): 0.15,
+        (building_ids[3], time_steps[-1]): ets_flow_time_array.loc[building_ids[3], time_steps[-1]]
+    }
+    changed_ets_flow_time_array = ets_flow_time_array.copy()
+    for (building_id, time_step), ets_flow in changed_ets_flows.items():
+        changed_ets_flow_time_array.loc[building_id, time_step] = ets_flow
+
+    updated_grid_simulation = grid.update_grid_simulation(grid_simulation, changed_ets_flows)
+    expected_grid_simulation = grid.get_grid_simulation(changed_ets_flow_time_array)
+    assert updated_grid_simulation.index.equals(expected_grid_simulation.index)
+    assert updated_grid_simulation.values == pytest.approx(expected_grid_simulation.values, rel=1e-9, abs=1e-9)
+    # Time steps without changes are left untouched
+    unchanged_time_steps = time_steps[1:10]
+    pd.testing.assert_frame_equal(
+        updated_grid_simulation[unchanged_time_steps],
+        grid_simulation[unchanged_time_steps]
+    )
+
+
+def test_chunked_grid_simulation_equals_grid_simulation(parameters, ets_flow_time_array):
+    grid = dc.CoolingGrid(parameters)
+    grid_simulation = grid.get_grid_simulation(ets_flow_time_array)
+    # Chunk size not dividing the number of time steps
+    chunks = list(grid.iterate_grid_simulation(ets_flow_time_array, chunk_size=7))
+    assert [len(chunk.columns) for chunk in chunks] == [7] * 6 + [6]
+    pd.testing.assert_frame_equal(pd.concat(chunks, axis=1), grid_simulation)
+
+
+def test_saved_grid_simulation_round_trip(parameters, ets_flow_time_array, tmp_path):
+    grid = dc.CoolingGrid(parameters)
+    grid.save_grid_simulation(ets_flow_time_array, str(tmp_path / 'store'), chunk_size=7)
+    loaded_grid_simulation = grid.load_grid_simulation(str(tmp_path / 'store'))
+    grid_simulation = grid.get_grid_simulation(ets_flow_time_array)
+    assert loaded_grid_simulation.index.equals(grid_simulation.index)
+    assert loaded_grid_simulation.index.names == grid_simulation.index.names
+    assert loaded_grid_simulation.columns.tolist() == grid_simulation.columns.tolist()
+    np.testing.assert_array_equal(loaded_grid_simulation.values, grid_simulation.values)
+
+
+def test_deduplicated_grid_simulation_equals_grid_simulation(parameters, ets_flow_time_array):
+    grid = dc.CoolingGrid(parameters)
+    assert ets_flow_time_array.T.duplicated().sum() == 5
+    pd.testing.assert_frame_equal(
+        grid.get_grid_simulation(ets_flow_time_array),
+        grid.get_grid_simulation(ets_flow_time_array, deduplicate=False)
+    )
+
+
+def test_dense_incidence_matrices_equal_original_ones(parameters):
+    # Incidence matrices as formed by the original loop
+    incidence_matrix_complete = pd.DataFrame(
+        {
+            node_id: [
+                -1 if node_id == line['Start'] else (1 if node_id == line['End'] else 0)
+                for _, line in parameters.lines.iterrows()
+            ]
+            for node_id in parameters.nodes.index
+        }
+    )
+    incidence_matrix_complete.index = list(parameters.lines.index)
+    reference_node_id = parameters.nodes.index[parameters.nodes['Type'] == 'reference'][-1]
+
+    grid = dc.CoolingGrid(parameters)
+    pd.testing.assert_frame_equal(grid.incidence_matrix_complete, incidence_matrix_complete)
+    pd.testing.assert_frame_equal(grid.incidence_matrix_potential, incidence_matrix_complete[[reference_node_id]])
+    pd.testing.assert_frame_equal(grid.incidence_matrix, incidence_matrix_complete.drop(columns=reference_node_id))
+    pd.testing.assert_frame_equal(
+        grid.incidence_matrix_transposed,
+        incidence_matrix_complete.drop(columns=reference_node_id).transpose()
+    )
+    np.testing.assert_array_equal(grid.compiled_grid.incidence_matrix.toarray(), incidence_matrix_complete.values)
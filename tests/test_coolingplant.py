@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import districtcooling as dc
+
+
+def test_TES_energy_content_follows_in_place_modified_flow_set(parameters):
+    plant = dc.CoolingPlant(parameters)
+    TES_flow_set = {time_step: 0.01 for time_step in parameters.environment.index}
+    last_time_step = parameters.environment.index[-1]
+    energy_content_before = plant.get_TES_energy_content(last_time_step, TES_flow_set, -1e9)
+
+    TES_flow_set[parameters.environment.index[0]] = 100.0
+    energy_content_after = plant.get_TES_energy_content(last_time_step, TES_flow_set, -1e9)
+    assert energy_content_after != pytest.approx(energy_content_before)
+
+    # Loop of the original implementation
+    TES_flow_sum = sum(TES_flow_set[time_step] for time_step in parameters.environment.index)
+    assert plant.get_TES_flow_sum_until_time_step(last_time_step, TES_flow_set) == pytest.approx(TES_flow_sum)
+
+
+def test_TES_energy_content_time_series_equals_per_time_step_values(parameters):
+    plant = dc.CoolingPlant(parameters)
+    TES_flow_set = dict(zip(parameters.environment.index, np.linspace(-0.2, 0.2, len(parameters.environment))))
+    TES_flow_cumulative_sums = plant.get_TES_flow_cumulative_sums(TES_flow_set)
+    time_series = plant.get_TES_energy_content_time_series(TES_flow_set, -1e9)
+    for time_step in parameters.environment.index:
+        assert time_series[time_step] == pytest.approx(
+            plant.get_TES_energy_content(time_step, TES_flow_set, -1e9, TES_flow_cumulative_sums)
+        )
+
+
+def test_TES_flow_cumulative_sums_raises_on_missing_time_steps(parameters):
+    plant = dc.CoolingPlant(parameters)
+    TES_flow_set = {time_step: 0.01 for time_step in parameters.environment.index[1:]}
+    with pytest.raises(KeyError):
+        plant.get_TES_flow_cumulative_sums(TES_flow_set)
+
+
+def test_TES_flow_sums_equal_summation_loop(parameters):
+    plant = dc.CoolingPlant(parameters)
+    TES_flows = np.random.default_rng(0).uniform(-1, 1, len(parameters.environment))
+    TES_flow_set = dict(zip(parameters.environment.index, TES_flows))
+    TES_flow_cumulative_sums = plant.get_TES_flow_cumulative_sums(TES_flow_set)
+    for time_step in parameters.environment.index:
+        # Loop of the original implementation
+        TES_flow_sum = 0
+        for time in parameters.environment.index:
+            TES_flow_sum += TES_flow_set[time]
+            if time == time_step:
+                break
+        assert plant.get_TES_flow_sum_until_time_step(time_step, TES_flow_set) == pytest.approx(TES_flow_sum)
+        assert plant.get_TES_flow_sum_until_time_step(
+            time_step,
+            TES_flow_set,
+            TES_flow_cumulative_sums
+        ) == pytest.approx(TES_flow_sum)
+
+
+def get_plant_simulation_loop(plant, chiller_set_flows, tes_flows, air_wet_bulbs):
+    # Loop of scalar simulations over all time steps
+    return pd.DataFrame(
+        [
+            plant.get_plant_simulation(chiller_set_flow, tes_flow, air_wet_bulb)
+            for chiller_set_flow, tes_flow, air_wet_bulb in zip(chiller_set_flows, tes_flows, air_wet_bulbs)
+        ],
+        index=air_wet_bulbs.index
+    )
+
+
+def test_plant_simulation_time_array_equals_loop_of_scalar_simulations(parameters):
+    plant = dc.CoolingPlant(parameters)
+    air_wet_bulbs = parameters.environment['Air wet-bulb temperature [°C]']
+    chiller_set_flows = np.linspace(0.0, 2.0, len(air_wet_bulbs))
+    tes_flows = np.linspace(-0.5, 0.5, len(air_wet_bulbs))
+    pd.testing.assert_frame_equal(
+        plant.get_plant_simulation_time_array(chiller_set_flows, tes_flows, air_wet_bulbs),
+        get_plant_simulation_loop(plant, chiller_set_flows, tes_flows, air_wet_bulbs)
+    )
+
+
+def test_plant_simulation_time_array_broadcasts_over_scenarios(parameters):
+    plant = dc.CoolingPlant(parameters)
+    air_wet_bulbs = parameters.environment['Air wet-bulb temperature [°C]']
+    tes_flows = np.linspace(-0.5, 0.5, len(air_wet_bulbs))
+    scenarios = pd.DataFrame(
+        [parameters.cooling_plant, parameters.cooling_plant * 1.1, parameters.cooling_plant * 0.9],
+        index=pd.Index(['reference', 'high', 'low'], name='SCENARIOS')
+    )
+    simulation = plant.get_plant_simulation_time_array(1.0, tes_flows, air_wet_bulbs, scenarios)
+    assert simulation.index.get_level_values(0).unique().tolist() == scenarios.index.tolist()
+    for scenario, cooling_plant in scenarios.iterrows():
+        scenario_plant = dc.CoolingPlant(parameters.derive(cooling_plant=cooling_plant))
+        pd.testing.assert_frame_equal(
+            simulation.loc[scenario],
+            get_plant_simulation_loop(scenario_plant, np.ones(len(air_wet_bulbs)), tes_flows, air_wet_bulbs),
+            check_names=False
+        )
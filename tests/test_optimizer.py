@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pyomo.environ as py
+import pytest
+
+import districtcooling as dc
+
+pytest.importorskip('highspy')
+
+
+@pytest.fixture
+def window_parameters(parameters):
+    window_parameters = parameters.get_time_window(end=12)
+    return window_parameters.derive(
+        buildings=pd.DataFrame(
+            {
+                'Size [m]': np.linspace(30, 60, len(parameters.buildings)),
+                'Temperature MIN [Celsius]': 21.0,
+                'Temperature MAX [Celsius]': 25.0,
+                'Initial Temperature [Celsius]': 23.0
+            },
+            index=parameters.buildings.index
+        )
+    )
+
+
+@pytest.fixture
+def optimizer(window_parameters):
+    optimizer = dc.LinearOptimizer(
+        parameters=window_parameters,
+        coolinggrid=dc.CoolingGrid(window_parameters),
+        coolingplant=dc.CoolingPlant(window_parameters),
+        buildings_dict=dc.CubicBuildingFleet(window_parameters, window_parameters.buildings)
+    )
+    optimizer.solver = py.SolverFactory('appsi_highs')
+    return optimizer
+
+
+@pytest.fixture
+def head_differences(window_parameters, optimizer):
+    grid = optimizer.modelled_grid
+    ets_flow_time_array = grid.build_ets_flow_time_array(np.full(len(window_parameters.buildings), 0.05))
+    head_differences = grid.get_grid_simulation(ets_flow_time_array).loc['Head difference over ETSs [m]']
+    head_differences.columns = [str(time_step) for time_step in head_differences.columns]
+    return head_differences
+
+
+def get_objective(optimizer, head_differences, TES_capacity_Wh, distributed_secondary_pumping):
+    problem = optimizer.build_and_solve_problem(
+        head_differences,
+        TES_capacity_Wh,
+        distributed_secondary_pumping=distributed_secondary_pumping
+    )
+    return py.value(problem.objective)
+
+
+def get_ETS_flow_count(problem):
+    constraint = problem.distribution_system_pumping_power_constraint[problem.time_set.first()]
+    return sum(
+        variable.parent_component() is problem.ets_flows_var
+        for variable in py.expr.identify_variables(constraint.body)
+    )
+
+
+def test_persistent_problem_equals_rebuilt_problems(optimizer, head_differences):
+    problem = optimizer.set_up_problem(head_differences, -1e-8)
+    assert py.value(optimizer.solve_persistent_problem().objective) == pytest.approx(
+        get_objective(optimizer, head_differences, -1e-8, False)
+    )
+
+    optimizer.update_problem(TES_capacity_Wh=-2e9, distributed_secondary_pumping=True)
+    assert py.value(optimizer.solve_persistent_problem().objective) == pytest.approx(
+        get_objective(optimizer, head_differences, -2e9, True)
+    )
+    assert problem is optimizer.problem
+
+    optimizer.update_problem(ds_head_differences_time_array=head_differences * 2, distributed_secondary_pumping=False)
+    assert py.value(optimizer.solve_persistent_problem().objective) == pytest.approx(
+        get_objective(optimizer, head_differences * 2, -2e9, False)
+    )
+
+
+def test_pumping_power_constraint_holds_ETS_flows_only_for_distributed_pumping(optimizer, head_differences):
+    problem = optimizer.set_up_problem(head_differences, -1e-8)
+    assert get_ETS_flow_count(problem) == 0
+
+    optimizer.update_problem(distributed_secondary_pumping=True)
+    assert get_ETS_flow_count(problem) == len(problem.building_ids)
+
+
+def test_persistent_solver_follows_solver(optimizer, head_differences):
+    optimizer.solver.options['threads'] = 1
+    optimizer.set_up_problem(head_differences, -1e-8)
+    assert type(optimizer.persistent_solver) is type(optimizer.solver)
+    assert optimizer.persistent_solver is not optimizer.solver
+    assert dict(optimizer.persistent_solver.options) == {'threads': 1}
+
+    optimizer.solver = py.SolverFactory('glpk')
+    with pytest.raises(ValueError):
+        optimizer.set_up_problem(head_differences, -1e-8)
+
+
+@pytest.mark.parametrize('distributed_secondary_pumping', [False, True])
+@pytest.mark.parametrize('TES_capacity_Wh', [-1e-8, -2e9])
+def test_matrix_backend_equals_pyomo_backend(
+    optimizer,
+    head_differences,
+    TES_capacity_Wh,
+    distributed_secondary_pumping
+):
+    matrix_problem = optimizer.build_and_solve_problem(
+        head_differences,
+        TES_capacity_Wh,
+        distributed_secondary_pumping=distributed_secondary_pumping,
+        backend='matrix'
+    )
+    assert matrix_problem.objective() == pytest.approx(
+        get_objective(optimizer, head_differences, TES_capacity_Wh, distributed_secondary_pumping)
+    )
+    solution = optimizer.get_solution_as_dataframe(matrix_problem)
+    assert solution.loc['Costs in [S$]'].values.sum() == pytest.approx(matrix_problem.objective())
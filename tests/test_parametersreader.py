@@ -0,0 +1,55 @@
+import os
+
+import pandas as pd
+import pytest
+
+import districtcooling as dc
+
+
+@pytest.mark.parametrize('name', ['lines', 'buildings', 'physics', 'environment'])
+def test_cached_parameter_sets_equal_uncached_ones(tmp_path, name):
+    uncached = dc.ParametersReader(cache_path=False, environment='environment_day.csv').load_parameters(name)
+    caching = dc.ParametersReader(cache_path=str(tmp_path), environment='environment_day.csv')
+    assert caching.load_parameters(name).equals(uncached)
+    # Loaded from the cache by a new parameters-object
+    cached = dc.ParametersReader(cache_path=str(tmp_path), environment='environment_day.csv').load_parameters(name)
+    if isinstance(uncached, pd.DataFrame):
+        pd.testing.assert_frame_equal(cached, uncached)
+    else:
+        pd.testing.assert_series_equal(cached, uncached)
+
+
+def test_cached_frames_are_writable_without_modifying_the_cache(tmp_path):
+    dc.ParametersReader(cache_path=str(tmp_path)).load_csv('lines.csv', index_col=0)
+    cached = dc.ParametersReader(cache_path=str(tmp_path)).load_csv('lines.csv', index_col=0)
+    original_value = cached.iloc[0, 0]
+    cached.iloc[0, 0] = original_value + 1.0
+    assert cached.iloc[0, 0] == original_value + 1.0
+    assert dc.ParametersReader(cache_path=str(tmp_path)).load_csv('lines.csv', index_col=0).iloc[0, 0] == original_value
+
+
+def test_cache_of_former_file_version_is_replaced(tmp_path):
+    data_path = tmp_path / 'data'
+    cache_path = tmp_path / 'cache'
+    data_path.mkdir()
+    (data_path / 'table.csv').write_text('ID,value\n1,1.0\n2,2.0\n')
+    parameters = dc.ParametersReader(data_path=str(data_path), cache_path=str(cache_path))
+    assert parameters.load_csv('table.csv', index_col=0)['value'].tolist() == [1.0, 2.0]
+    parameters.load_csv('table.csv')
+
+    (data_path / 'table.csv').write_text('ID,value\n1,3.0\n2,4.0\n5,6.0\n')
+    assert parameters.load_csv('table.csv', index_col=0)['value'].tolist() == [3.0, 4.0, 6.0]
+    # One cache per reading options, without leftover temporary directories
+    assert len(os.listdir(cache_path)) == 2
+
+
+def test_files_are_cached_in_data_directory_by_default(tmp_path):
+    parameters = dc.ParametersReader()
+    assert parameters.cache_path == os.path.join(parameters.data_path, 'cache')
+    assert parameters.derive(environment='environment_day.csv').cache_path == parameters.cache_path
+
+    (tmp_path / 'table.csv').write_text('ID,value\n1,1.0\n')
+    dc.ParametersReader(data_path=str(tmp_path), cache_path=False).load_csv('table.csv', index_col=0)
+    assert os.listdir(tmp_path) == ['table.csv']
+    dc.ParametersReader(data_path=str(tmp_path)).load_csv('table.csv', index_col=0)
+    assert len(os.listdir(tmp_path / 'cache')) == 1
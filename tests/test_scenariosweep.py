@@ -0,0 +1,60 @@
+import os
+
+import pandas as pd
+import pytest
+
+import districtcooling as dc
+
+pytest.importorskip('highspy')
+
+
+def build_simple_scenario_objects():
+    parameters = dc.ParametersReader(environment='environment_day.csv').get_time_window(end=6)
+    buildings = pd.DataFrame(
+        {
+            'Size [m]': 40.0,
+            'Temperature MIN [Celsius]': 21.0,
+            'Temperature MAX [Celsius]': 25.0,
+            'Initial Temperature [Celsius]': 23.0
+        },
+        index=parameters.buildings.index
+    )
+    return parameters, dc.CubicBuildingFleet(parameters, buildings)
+
+
+def get_scenario_sweep(results_path, **options):
+    return dc.ScenarioSweep(
+        scenarios=[
+            {'name': 'without TES', 'TES_capacity_Wh': -1e-8},
+            {'name': 'with TES', 'TES_capacity_Wh': -2e9, 'distributed_secondary_pumping': True}
+        ],
+        builder=build_simple_scenario_objects,
+        results_path=str(results_path),
+        processes=1,
+        solver_name='appsi_highs',
+        **options
+    )
+
+
+def test_scenario_sweep_saves_solutions_atomically_and_skips_solved_scenarios(tmp_path):
+    scenario_sweep = get_scenario_sweep(tmp_path, solver_threads=1)
+    results = scenario_sweep.run()
+    assert list(results.index.get_level_values('SCENARIOS').unique()) == ['without TES', 'with TES']
+    assert scenario_sweep.get_pending_scenarios() == []
+    assert all(file_name.endswith('_scenario_solution.csv') for file_name in os.listdir(tmp_path))
+
+    os.remove(scenario_sweep.get_result_file_path(str(tmp_path), scenario_sweep.scenarios[1]))
+    assert [scenario['name'] for scenario in scenario_sweep.get_pending_scenarios()] == ['with TES']
+    pd.testing.assert_frame_equal(scenario_sweep.run(), results)
+
+
+def test_scenario_sweep_does_not_take_solutions_of_other_settings(tmp_path):
+    get_scenario_sweep(tmp_path).run()
+    assert len(get_scenario_sweep(tmp_path, backend='matrix').get_pending_scenarios()) == 2
+
+
+def test_scenario_sweep_raises_on_unsupported_solver_threads(tmp_path):
+    with pytest.raises(ValueError):
+        get_scenario_sweep(tmp_path, solver_threads=1, backend='matrix')
+    with pytest.raises(ValueError):
+        dc.ScenarioSweep([], results_path=str(tmp_path), solver_name='glpk', solver_threads=1)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import districtcooling as dc
+from districtcooling.stackedbuildings import get_building_matrices
+
+
+def test_fleet_defaults_to_simple_buildings(parameters):
+    fleet = dc.CubicBuildingFleet(parameters)
+    simple_buildings = parameters.load_csv('simple_buildings.csv', index_col=0)
+    assert list(fleet) == simple_buildings.index.tolist()
+    assert fleet.length_edges.tolist() == simple_buildings['Size [m]'].tolist()
+
+
+def test_building_temperature_time_series_equals_per_time_step_values(parameters):
+    building_id = 2
+    building = dc.CubicBuilding(building_id, parameters.derive(buildings='simple_buildings.csv'))
+    building_heat_flow_set = {
+        (time_step, building_id): heat_flow
+        for time_step, heat_flow in zip(parameters.environment.index, np.linspace(0, 1e6, len(parameters.environment)))
+    }
+    heat_flows = np.array(list(building_heat_flow_set.values()))
+    time_series = building.get_building_temperature_time_series(heat_flows)
+    for position, time_step in enumerate(parameters.environment.index):
+        assert time_series[position] == pytest.approx(
+            building.get_building_temperature(time_step, building_id, building_heat_flow_set)
+        )
+
+
+def test_building_temperature_time_series_raises_on_many_buildings(parameters):
+    building = dc.CubicBuilding(2, parameters.derive(buildings='simple_buildings.csv'))
+    with pytest.raises(ValueError):
+        building.get_building_temperature_time_series(np.zeros((len(parameters.environment), 2)))
+
+
+def test_fleet_models_only_the_time_window(parameters):
+    window_parameters = parameters.get_time_window(start=10, end=20)
+    fleet = dc.CubicBuildingFleet(window_parameters)
+    building_id = list(fleet)[0]
+    assert fleet[building_id].set_timesteps.tolist() == list(range(10, 21))
+
+    building_matrices = get_building_matrices(fleet[building_id], window_parameters.environment.index)
+    assert building_matrices['disturbances'][:, 0] == pytest.approx(fleet.heat_loss_flows[0])
+    with pytest.raises(ValueError):
+        get_building_matrices(fleet[building_id], parameters.environment.index)
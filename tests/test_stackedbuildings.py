@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import districtcooling as dc
+
+
+@pytest.fixture
+def stacked_buildings(parameters):
+    return dc.StackedBuildings(parameters, dc.CubicBuildingFleet(parameters))
+
+
+def test_simulation_equals_fleet_temperatures(parameters, stacked_buildings):
+    fleet = dc.CubicBuildingFleet(parameters)
+    heat_flows = pd.DataFrame(
+        np.linspace(0, 1e6, len(parameters.environment) * len(fleet)).reshape(-1, len(fleet)),
+        index=parameters.environment.index,
+        columns=list(fleet)
+    )
+    control_timeseries = pd.DataFrame(
+        heat_flows.values,
+        index=heat_flows.index,
+        columns=pd.MultiIndex.from_tuples([(building_id, 'thermal_power_cooling') for building_id in fleet])
+    )
+    state_timeseries, _ = stacked_buildings.simulate(control_timeseries)
+    # States are the temperatures at the beginning of the time steps
+    temperatures = fleet.get_building_temperature_time_array(heat_flows)
+    assert state_timeseries.values[1:] == pytest.approx(temperatures.values[:-1])
+
+
+def test_simulation_raises_on_unknown_controls(parameters, stacked_buildings):
+    control_timeseries = pd.DataFrame(
+        0.0,
+        index=parameters.environment.index,
+        columns=pd.MultiIndex.from_tuples([(2, 'thermal_power_coolling')])
+    )
+    with pytest.raises(ValueError):
+        stacked_buildings.simulate(control_timeseries)